@@ -0,0 +1,213 @@
+"""
+Interchangeable EC backends behind one API.
+
+Every backend offers the example.py functions with the same types: affine
+points are (x, y) tuples or INF (None), and pubkeys are compressed hex:
+
+    point_add, point_neg, subtract_points, scalar_mult, scalar_mult_base,
+    decompress_pubkey, compress_pubkey, pubkey_from_scalar, add_pubkeys,
+    subtract_pubkeys
+
+    "python"     example.py (reference; fixed-base table + Jacobian math)
+    "fastecdsa"  C-backed point arithmetic from fastecdsa (requirements.txt)
+
+The module-level functions delegate to the active backend, which is the
+python reference until use_backend() picks another: by name, "auto" for
+the fastest on a short calibration run, or by default whatever the
+MOJO_EC_BACKEND environment variable names. Importing the module selects
+and calibrates nothing. midd3.py (and midd.py) and bsgs.py take --backend;
+their workers are forked after the choice and inherit it.
+`python backend.py` cross-checks all available backends against the
+reference and prints their speed.
+"""
+
+import os
+import random
+import time
+import example
+
+try:
+    from fastecdsa.curve import secp256k1 as _fast_curve
+    from fastecdsa.point import Point as _FastPoint
+except ImportError:
+    _fast_curve = None
+
+INF = example.INF
+ENV = "MOJO_EC_BACKEND"
+API = ("point_add", "point_neg", "subtract_points", "scalar_mult", "scalar_mult_base",
+       "decompress_pubkey", "compress_pubkey", "pubkey_from_scalar", "add_pubkeys",
+       "subtract_pubkeys")
+
+
+class PythonBackend:
+    name = "python"
+    point_add = staticmethod(example.point_add)
+    point_neg = staticmethod(example.point_neg)
+    subtract_points = staticmethod(example.subtract_points)
+    scalar_mult = staticmethod(example.scalar_mult)
+    scalar_mult_base = staticmethod(example.scalar_mult_base)
+    decompress_pubkey = staticmethod(example.decompress_pubkey)
+    compress_pubkey = staticmethod(example.compress_pubkey)
+    pubkey_from_scalar = staticmethod(example.pubkey_from_scalar)
+    add_pubkeys = staticmethod(example.add_pubkeys)
+    subtract_pubkeys = staticmethod(example.subtract_pubkeys)
+
+
+class FastecdsaBackend:
+    """fastecdsa Point arithmetic, converted to/from the tuple API at the edges.
+
+    Only finite points are handed to fastecdsa: INF and P + (-P) are settled
+    on the tuples, and k*P with k != 0 mod n is finite for any finite P.
+    """
+
+    name = "fastecdsa"
+
+    @staticmethod
+    def _to_fast(point):
+        return _FastPoint(point[0], point[1], curve=_fast_curve)
+
+    @classmethod
+    def point_add(cls, a, b):
+        if a is INF:
+            return b
+        if b is INF:
+            return a
+        if a[0] == b[0] and a[1] != b[1]:
+            return INF
+        P = cls._to_fast(a) + cls._to_fast(b)
+        return (P.x, P.y)
+
+    point_neg = staticmethod(example.point_neg)
+
+    @classmethod
+    def subtract_points(cls, a, b):
+        return cls.point_add(a, example.point_neg(b))
+
+    @classmethod
+    def scalar_mult(cls, k: int, point=example.G):
+        k %= example.N_ORDER
+        if point is INF or k == 0:
+            return INF
+        P = k * cls._to_fast(point)
+        return (P.x, P.y)
+
+    @classmethod
+    def scalar_mult_base(cls, k: int):
+        return cls.scalar_mult(k)
+
+    # No C square root in fastecdsa; decoding/encoding is shared with the reference
+    decompress_pubkey = staticmethod(example.decompress_pubkey)
+    compress_pubkey = staticmethod(example.compress_pubkey)
+
+    @classmethod
+    def pubkey_from_scalar(cls, k: int) -> str:
+        if not (0 <= k < example.N_ORDER):
+            raise ValueError("Scalar must be in range 0 <= k < n")
+        return example.compress_pubkey(cls.scalar_mult(k))
+
+    @classmethod
+    def add_pubkeys(cls, pubkey_a: str, pubkey_b: str) -> str:
+        return example.compress_pubkey(cls.point_add(example.decompress_pubkey(pubkey_a),
+                                                     example.decompress_pubkey(pubkey_b)))
+
+    @classmethod
+    def subtract_pubkeys(cls, pubkey_a: str, pubkey_b: str) -> str:
+        return example.compress_pubkey(cls.point_add(example.decompress_pubkey(pubkey_a),
+                                                     example.point_neg(example.decompress_pubkey(pubkey_b))))
+
+
+BACKENDS = {"python": PythonBackend}
+if _fast_curve is not None:
+    BACKENDS["fastecdsa"] = FastecdsaBackend
+
+
+def available_backends():
+    return list(BACKENDS)
+
+
+def calibrate(backend, n=20, seed=7):
+    """Seconds for a small mix of the operations the search scripts use."""
+    rng = random.Random(seed)
+    scalars = [rng.randrange(1, example.N_ORDER) for _ in range(n)]
+    pubs = [example.pubkey_from_scalar(k) for k in scalars[:2]]
+    start = time.perf_counter()
+    for k in scalars:
+        backend.pubkey_from_scalar(k)
+        backend.subtract_pubkeys(pubs[0], pubs[1])
+    return time.perf_counter() - start
+
+
+def fastest_backend():
+    example.fixed_base_table()   # one-off setup, not part of the comparison
+    return min(BACKENDS.values(), key=calibrate)
+
+
+def use_backend(name: str = None):
+    """Make the named backend active and return it.
+
+    name None reads MOJO_EC_BACKEND (default "python"); "auto" calibrates
+    every available backend and takes the fastest.
+    """
+    global active
+    if name is None:
+        name = os.environ.get(ENV) or "python"
+    if name == "auto":
+        backend = fastest_backend()
+    elif name in BACKENDS:
+        backend = BACKENDS[name]
+    else:
+        raise ValueError(f"Unknown or unavailable EC backend: {name} (have: {', '.join(BACKENDS)})")
+    active = backend
+    globals().update({fn: getattr(backend, fn) for fn in API})
+    return backend
+
+
+def cross_check(n=50, seed=11):
+    """Compare every available backend with the python reference on random inputs."""
+    rng = random.Random(seed)
+    ref = PythonBackend
+    scalars = [rng.randrange(1, example.N_ORDER) for _ in range(n)] + [1, 2, example.N_ORDER - 1]
+    points = [ref.scalar_mult(k) for k in scalars]
+    pubs = [ref.compress_pubkey(p) for p in points]
+    cases = [
+        ("point_add", [(a, b) for a, b in zip(points, points[1:] + points[:1])]
+                      + [(points[0], points[0]), (points[0], ref.point_neg(points[0])),
+                         (INF, points[1]), (points[1], INF)]),
+        ("point_neg", [(p,) for p in points] + [(INF,)]),
+        ("subtract_points", [(a, b) for a, b in zip(points, points[1:] + points[:1])]
+                            + [(points[0], points[0]), (INF, points[1]), (points[1], INF)]),
+        ("scalar_mult", [(k, p) for k, p in zip(scalars, reversed(points))]
+                        + [(0, points[0]), (example.N_ORDER, points[0]), (5, INF), (-3, points[1])]),
+        ("scalar_mult_base", [(k,) for k in scalars] + [(0,), (example.N_ORDER,), (-3,)]),
+        ("decompress_pubkey", [(pub,) for pub in pubs]),
+        ("compress_pubkey", [(p,) for p in points]),
+        ("pubkey_from_scalar", [(k,) for k in scalars] + [(0,)]),
+        ("add_pubkeys", list(zip(pubs, pubs[1:] + pubs[:1]))),
+        ("subtract_pubkeys", list(zip(pubs, pubs[1:] + pubs[:1])) + [(pubs[0], pubs[0])]),
+    ]
+    for backend in BACKENDS.values():
+        for fn, args_list in cases:
+            for args in args_list:
+                got = getattr(backend, fn)(*args)
+                want = getattr(ref, fn)(*args)
+                if got != want:
+                    raise AssertionError(f"{backend.name}.{fn}{args!r}: {got!r} != {want!r}")
+    return True
+
+
+def add_backend_argument(parser):
+    parser.add_argument("--backend", default=None, choices=available_backends() + ["auto"],
+                        help=f"EC backend for the per-block setup and match checks "
+                             f"(default: ${ENV}, else python; auto: fastest here)")
+
+
+active = PythonBackend
+globals().update({fn: getattr(active, fn) for fn in API})
+
+
+if __name__ == "__main__":
+    cross_check()
+    print(f"Cross-check passed for: {', '.join(BACKENDS)}")
+    for backend in BACKENDS.values():
+        print(f"{backend.name:10} {calibrate(backend, n=200):.3f}s for 200 pubkey_from_scalar + subtract_pubkeys")
+    print(f"Fastest here: {use_backend('auto').name}")
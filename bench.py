@@ -0,0 +1,175 @@
+"""
+Microbenchmarks for the EC primitives and the search loop.
+
+Reports ops/sec and latency percentiles for each primitive in example.py,
+for the same operations through fastecdsa (the C-backed path main.py and
+test.py use, when installed), and for end-to-end candidate checks through
+midd3.worker. Results can be saved as JSON and compared with an earlier run:
+
+    python bench.py --json before.json
+    python bench.py --json after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import multiprocessing as mp
+from example import *
+
+try:
+    from fastecdsa.curve import secp256k1
+    from fastecdsa.point import Point
+except ImportError:
+    secp256k1 = None
+
+
+def measure(fn, args_list, repeat=1):
+    """Time fn(*args) for every args tuple; latencies are per call / repeat."""
+    latencies = []
+    start = time.perf_counter()
+    for args in args_list:
+        t0 = time.perf_counter_ns()
+        fn(*args)
+        latencies.append((time.perf_counter_ns() - t0) / repeat)
+    total = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] / 1000
+
+    return {"ops_per_sec": len(args_list) * repeat / total, "samples": len(args_list),
+            "p50_us": pct(50), "p90_us": pct(90), "p99_us": pct(99)}
+
+
+def python_cases(n, rng):
+    scalars = [rng.randrange(1, N_ORDER) for _ in range(n)]
+    points = [scalar_mult_base(k) for k in scalars]
+    pubs = [compress_pubkey(p) for p in points]
+    pairs = list(zip(points, points[1:] + points[:1]))
+    return {
+        "point_add": (point_add, pairs),
+        "scalar_mult": (scalar_mult, [(k, p) for k, p in zip(scalars, reversed(points))]),
+        "scalar_mult_glv": (scalar_mult_glv, [(k, p) for k, p in zip(scalars, reversed(points))]),
+        "decompress_pubkey": (decompress_pubkey, [(pub,) for pub in pubs]),
+        "compress_pubkey": (compress_pubkey, [(p,) for p in points]),
+        "pubkey_from_scalar": (pubkey_from_scalar, [(k,) for k in scalars]),
+        "subtract_pubkeys": (subtract_pubkeys, list(zip(pubs, pubs[1:] + pubs[:1]))),
+    }
+
+
+def fastecdsa_cases(n, rng):
+    p, b = secp256k1.p, secp256k1.b
+    G_fast = secp256k1.G
+
+    def decompress(pub_hex):
+        raw = bytes.fromhex(pub_hex)
+        x = int.from_bytes(raw[1:], "big")
+        beta = pow((pow(x, 3, p) + b) % p, (p + 1) // 4, p)
+        y = beta if ((beta % 2 == 0) == (raw[0] == 2)) else p - beta
+        return Point(x, y, curve=secp256k1)
+
+    def compress(P):
+        return ("02" if P.y % 2 == 0 else "03") + format(P.x, "064x")
+
+    scalars = [rng.randrange(1, N_ORDER) for _ in range(n)]
+    points = [k * G_fast for k in scalars]
+    pubs = [compress(P) for P in points]
+    return {
+        "point_add": (lambda a, c: a + c, list(zip(points, points[1:] + points[:1]))),
+        "scalar_mult": (lambda k, P: k * P, [(k, P) for k, P in zip(scalars, reversed(points))]),
+        "decompress_pubkey": (decompress, [(pub,) for pub in pubs]),
+        "compress_pubkey": (compress, [(P,) for P in points]),
+        "pubkey_from_scalar": (lambda k: compress(k * G_fast), [(k,) for k in scalars]),
+        "subtract_pubkeys": (lambda a, c: compress(decompress(a) - decompress(c)),
+                             list(zip(pubs, pubs[1:] + pubs[:1]))),
+    }
+
+
+def worker_cases(samples, batch_size, rng):
+    """One sample = a full midd3.worker run over a few blocks; reported per candidate."""
+    import midd3
+
+    table = {point_to_bytes(scalar_mult_base(rng.randrange(1, 2**64))): 1 for _ in range(1000)}
+    target = pubkey_from_scalar(rng.randrange(2**80, 2**81))
+    stop_event = mp.Event()
+    result_queue = mp.Queue()
+    attempts = 4 * batch_size
+
+    def run(mode):
+        midd3.worker(target, 2**79, 2**80, table, stop_event, result_queue, 0,
+                     attempts, batch_size, mode)
+
+    return {f"worker_{mode}": (run, [(mode,)] * samples, attempts) for mode in ("random", "scan")}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(n=2000, worker_samples=5, batch_size=1024, only=None, seed=1):
+    rng = random.Random(seed)
+    fixed_base_table()   # table build is a one-off, keep it out of the numbers
+    check_glv()          # never time a scalar_mult_glv that disagrees with scalar_mult
+
+    groups = {"python": python_cases(n, rng)}
+    if secp256k1 is not None:
+        groups["fastecdsa"] = fastecdsa_cases(n, rng)
+    else:
+        print("fastecdsa not installed; skipping the C-backed comparison")
+
+    results = {}
+    for backend, cases in groups.items():
+        for name, (fn, args_list) in cases.items():
+            if only and name not in only:
+                continue
+            results[f"{backend}.{name}"] = measure(fn, args_list)
+    for name, (fn, args_list, per_sample) in worker_cases(worker_samples, batch_size, rng).items():
+        if only and name not in only:
+            continue
+        results[f"python.{name}"] = measure(fn, args_list, repeat=per_sample)
+
+    return {"meta": {"time": time.time(), "python": sys.version.split()[0],
+                     "platform": platform.platform(), "git": git_revision(),
+                     "iterations": n, "batch_size": batch_size},
+            "results": results}
+
+
+def print_report(report, baseline=None):
+    base = baseline["results"] if baseline else {}
+    print(f"{'benchmark':34} {'ops/sec':>12} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10}"
+          + (f" {'vs base':>8}" if base else ""))
+    for name, r in report["results"].items():
+        line = (f"{name:34} {r['ops_per_sec']:12,.0f} {r['p50_us']:10.1f} "
+                f"{r['p90_us']:10.1f} {r['p99_us']:10.1f}")
+        if name in base:
+            line += f" {r['ops_per_sec'] / base[name]['ops_per_sec']:7.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark EC primitives and the search loop")
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    parser.add_argument("--worker-samples", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--only", nargs="*", help="benchmark names, e.g. point_add worker_scan")
+    parser.add_argument("--json", help="save results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.iterations, args.worker_samples, args.batch_size, args.only)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,241 @@
+"""
+Compact binary format for precomputed "exp pubkey" tables.
+
+Layout (all big-endian):
+    header   7-byte magic, 1-byte exponent width w, 8-byte record count
+    records  8-byte fingerprint + w-byte exponent, sorted by fingerprint
+
+In x-only tables (magic MOJOTX1, the default) the fingerprint is the top 64
+bits of x: P and -P share it, so one entry for e*G also answers -e*G and the
+caller resolves the sign. Older MOJOTB1 tables use the top 63 bits of x with
+the pubkey parity as the low bit. Either way a 9,000,000-entry table is ~9M * (8 + w) bytes on disk instead of a
+multi-GB dict. The file is opened with mmap and searched in place
+(interpolation search - x is uniformly distributed - with a binary-search
+fallback), so nothing is parsed at startup.
+
+SharedTable holds the same layout in multiprocessing.shared_memory, for
+tables loaded from text that should still exist only once across workers.
+
+A fingerprint match is not proof of a match: callers verify k, as the
+search worker already does.
+"""
+
+import mmap
+import struct
+from multiprocessing import shared_memory
+
+MAGIC = b"MOJOTB1"
+MAGIC_X = b"MOJOTX1"
+HEADER = struct.Struct(">7sBQ")
+FP = struct.Struct(">Q")
+_INTERPOLATION_PROBES = 8
+
+
+def key_fingerprint(key, x_only: bool = False) -> int:
+    """Fingerprint of a compressed pubkey (33 bytes or 66 hex chars) or of a
+    bare 32-byte x coordinate, which is always fingerprinted x-only."""
+    if isinstance(key, str):
+        key = bytes.fromhex(key)
+    if len(key) == 32:
+        return int.from_bytes(key[:8], "big")
+    if x_only:
+        return int.from_bytes(key[1:9], "big")
+    return (int.from_bytes(key[1:9], "big") & ~1) | (key[0] & 1)
+
+
+def pack_table(items, x_only: bool = True) -> bytes:
+    """Header + sorted records for (compressed_key, exp) pairs."""
+    records = sorted((key_fingerprint(key, x_only), exp) for key, exp in items)
+    width = max((exp.bit_length() + 7) // 8 for _, exp in records) if records else 1
+    return (HEADER.pack(MAGIC_X if x_only else MAGIC, width, len(records))
+            + b"".join(FP.pack(fp) + exp.to_bytes(width, "big") for fp, exp in records))
+
+
+def write_table(filename: str, items, x_only: bool = True):
+    """Write (compressed_key, exp) pairs as a sorted binary table."""
+    data = pack_table(items, x_only)
+    with open(filename, "wb") as f:
+        f.write(data)
+    return HEADER.unpack_from(data, 0)[2]
+
+
+def read_text_table(filename: str):
+    """Yield (pub_hex, exp) from a "exp pubkey_hex" text table."""
+    with open(filename, "r") as f:
+        for line_num, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) != 2:
+                print(f"Warning: line {line_num} malformed, skipping: {line.strip()}")
+                continue
+            try:
+                yield parts[1], int(parts[0])
+            except ValueError:
+                print(f"Warning: line {line_num} has bad exponent, skipping: {line.strip()}")
+
+
+def convert_text_table(src: str, dst: str, x_only: bool = True):
+    """Convert precomputed_hex.txt-style text into the binary format."""
+    count = write_table(dst, read_text_table(src), x_only)
+    print(f"Converted {count} entries from {src} to {dst}")
+    return count
+
+
+def is_binary_table(filename: str) -> bool:
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) in (MAGIC, MAGIC_X)
+
+
+class PackedTable:
+    """Read-only lookups over a packed table held in any buffer.
+
+    `key in table`, `table[key]` and `table.get(key)` accept 33-byte
+    compressed keys or hex strings, so worker() uses it unchanged. When
+    x_only is set the parity byte is ignored (and 32-byte x keys work too).
+    """
+
+    def _open(self, buf, name: str):
+        self._buf = buf
+        magic, self._width, self._count = HEADER.unpack_from(buf, 0)
+        if magic not in (MAGIC, MAGIC_X):
+            raise ValueError(f"{name} is not a binary precomputed table")
+        self.x_only = magic == MAGIC_X
+        self._record = FP.size + self._width
+        if len(buf) < HEADER.size + self._count * self._record:
+            raise ValueError(f"{name} is truncated or corrupt")
+
+    def __len__(self):
+        return self._count
+
+    def _fp(self, i: int) -> int:
+        return FP.unpack_from(self._buf, HEADER.size + i * self._record)[0]
+
+    def _find(self, fp: int) -> int:
+        lo, hi = 0, self._count - 1
+        if hi < 0:
+            return -1
+        fp_lo, fp_hi = self._fp(lo), self._fp(hi)
+        for _ in range(_INTERPOLATION_PROBES):
+            if not (lo <= hi and fp_lo <= fp <= fp_hi):
+                return -1
+            if fp_hi == fp_lo:
+                mid = lo
+            else:
+                mid = lo + (fp - fp_lo) * (hi - lo) // (fp_hi - fp_lo)
+            value = self._fp(mid)
+            if value == fp:
+                return mid
+            if value < fp:
+                lo = mid + 1
+                if lo <= hi:
+                    fp_lo = self._fp(lo)
+            else:
+                hi = mid - 1
+                if hi >= lo:
+                    fp_hi = self._fp(hi)
+
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            value = self._fp(mid)
+            if value == fp:
+                return mid
+            if value < fp:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return -1
+
+    def fingerprints(self):
+        """Yield the stored fingerprints in sorted order."""
+        for i in range(self._count):
+            yield self._fp(i)
+
+    def _exp(self, i: int) -> int:
+        start = HEADER.size + i * self._record + FP.size
+        return int.from_bytes(self._buf[start:start + self._width], "big")
+
+    def get(self, key, default=None):
+        i = self._find(key_fingerprint(key, self.x_only))
+        return default if i < 0 else self._exp(i)
+
+    def __contains__(self, key):
+        return self._find(key_fingerprint(key, self.x_only)) >= 0
+
+    def __getitem__(self, key):
+        i = self._find(key_fingerprint(key, self.x_only))
+        if i < 0:
+            raise KeyError(key)
+        return self._exp(i)
+
+
+class BinaryTable(PackedTable):
+    """A binary table file, mmapped read-only (pages are shared by all processes)."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            self._open(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), filename)
+
+    def __reduce__(self):
+        # Pickle by name: spawned workers reopen the mmap instead of copying it
+        return (BinaryTable, (self.filename,))
+
+    def close(self):
+        self._buf.close()
+
+
+class SharedTable(PackedTable):
+    """A packed table in multiprocessing.shared_memory.
+
+    Built once in the parent (from_items); workers attach to the same block
+    by name, so N workers cost one copy of the table, not N. The creating
+    process calls close() to free the block.
+    """
+
+    def __init__(self, shm, owner: bool = False):
+        self._shm = shm
+        self._owner = owner
+        self._open(shm.buf, f"shared memory {shm.name}")
+
+    @classmethod
+    def from_items(cls, items, x_only: bool = True):
+        data = pack_table(items, x_only)
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return cls(shm, owner=True)
+
+    @classmethod
+    def from_table(cls, table):
+        """Shared copy of a dict table (keyed as table.x_only says), for handing
+        to worker processes instead of pickling it per worker (spawn) or letting
+        refcounts un-share its pages (fork). None for any other table: binary
+        tables are already a shared read-only mmap."""
+        if not isinstance(table, dict):
+            return None
+        return cls.from_items(table.items(), getattr(table, "x_only", False))
+
+    @classmethod
+    def attach(cls, name: str):
+        # Worker processes share the parent's resource tracker, so attaching
+        # here does not take over the block's lifetime.
+        return cls(shared_memory.SharedMemory(name=name))
+
+    def __reduce__(self):
+        return (SharedTable.attach, (self._shm.name,))
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = [a for a in sys.argv[1:] if a != "--with-parity"]
+    if len(args) != 2:
+        print("Usage: python bintable.py [--with-parity] precomputed_hex.txt precomputed.bin")
+        sys.exit(1)
+    convert_text_table(args[0], args[1], x_only="--with-parity" not in sys.argv)
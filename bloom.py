@@ -0,0 +1,174 @@
+"""
+Bloom filter in front of a big precomputed table.
+
+Almost every candidate Q - r*G misses the table. The filter rejects nearly
+all misses after reading one 64-byte block, and only filter hits go on to
+the exact table, e.g. a BinaryTable mmapped from disk. It is a blocked
+Bloom filter: all probes for a key fall into the same 512-bit block.
+
+Layout (big-endian):
+    header   7-byte magic, 1-byte flags (bit 0: x-only), 1-byte probe count,
+             8-byte block count
+    blocks   64 bytes each
+
+The filter is keyed by the same 64-bit fingerprint as bintable.py, and it
+is built once from a table file:
+
+    python bloom.py precomputed.bin precomputed.bloom --fp-rate 0.001
+
+Workers open the file with mmap, so it exists only once in RAM however
+many processes use it. FilteredTable wraps filter + table behind the usual
+`in` / `[]` / get() interface, so worker() runs on it unchanged.
+"""
+
+import argparse
+import math
+import mmap
+import struct
+from bintable import BinaryTable, is_binary_table, key_fingerprint, read_text_table
+
+MAGIC = b"MOJOBF1"
+HEADER = struct.Struct(">7sBBQ")
+BLOCK_BYTES = 64
+MAX_PROBES = 7          # 7 probes x 9 bits each come from one 64-bit hash
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(fp: int) -> int:
+    """splitmix64 finaliser: decorrelates probe bits from the block index."""
+    z = (fp + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def filter_size(count: int, fp_rate: float):
+    """(blocks, probes) for count keys at roughly the given false-positive rate."""
+    bits = max(1, math.ceil(-count * math.log(fp_rate) / math.log(2) ** 2))
+    probes = min(MAX_PROBES, max(1, round(bits / max(count, 1) * math.log(2))))
+    return (bits + 8 * BLOCK_BYTES - 1) // (8 * BLOCK_BYTES), probes
+
+
+class BloomFilter:
+    """Blocked Bloom filter over 64-bit fingerprints.
+
+    Built in memory with create()/add() and written with save(); open()
+    mmaps a saved filter read-only. Pickles by filename once saved.
+    """
+
+    def __init__(self, buf, blocks: int, probes: int, x_only: bool, filename: str = None):
+        self._buf = buf
+        self._blocks = blocks
+        self._probes = probes
+        self.x_only = x_only
+        self.filename = filename
+
+    @classmethod
+    def create(cls, count: int, fp_rate: float = 0.001, x_only: bool = True):
+        blocks, probes = filter_size(count, fp_rate)
+        return cls(bytearray(blocks * BLOCK_BYTES), blocks, probes, x_only)
+
+    @classmethod
+    def open(cls, filename: str):
+        with open(filename, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, flags, probes, blocks = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a Bloom filter file")
+        if len(buf) < HEADER.size + blocks * BLOCK_BYTES:
+            raise ValueError(f"{filename} is truncated or corrupt")
+        return cls(memoryview(buf)[HEADER.size:], blocks, probes, bool(flags & 1), filename)
+
+    def __reduce__(self):
+        if self.filename is None:
+            raise TypeError("save() the filter before sharing it with other processes")
+        return (BloomFilter.open, (self.filename,))
+
+    def _positions(self, fp: int):
+        base = ((fp * self._blocks) >> 64) * BLOCK_BYTES
+        h = _mix(fp)
+        for _ in range(self._probes):
+            yield base + ((h & 511) >> 3), 1 << (h & 7)
+            h >>= 9
+
+    def add(self, fp: int):
+        for offset, bit in self._positions(fp):
+            self._buf[offset] |= bit
+
+    def __contains__(self, fp: int) -> bool:
+        # _positions() inlined: this runs once per candidate
+        buf = self._buf
+        base = ((fp * self._blocks) >> 64) * BLOCK_BYTES
+        h = _mix(fp)
+        for _ in range(self._probes):
+            if not buf[base + ((h & 511) >> 3)] & (1 << (h & 7)):
+                return False
+            h >>= 9
+        return True
+
+    def save(self, filename: str):
+        with open(filename, "wb") as f:
+            f.write(HEADER.pack(MAGIC, int(self.x_only), self._probes, self._blocks))
+            f.write(self._buf)
+        self.filename = filename
+
+    @property
+    def nbytes(self) -> int:
+        return self._blocks * BLOCK_BYTES
+
+
+def table_fingerprints(filename: str):
+    """(count, x_only, fingerprint iterator) for a binary or text table file."""
+    if is_binary_table(filename):
+        table = BinaryTable(filename)
+        return len(table), table.x_only, table.fingerprints()
+    with open(filename, "rb") as f:
+        count = sum(1 for line in f if line.strip())
+    return count, True, (key_fingerprint(key, True) for key, _ in read_text_table(filename))
+
+
+def build_filter(table_file: str, filter_file: str, fp_rate: float = 0.001):
+    """Build the filter for a table file and save it next to it."""
+    count, x_only, fps = table_fingerprints(table_file)
+    bloom = BloomFilter.create(count, fp_rate, x_only)
+    for fp in fps:
+        bloom.add(fp)
+    bloom.save(filter_file)
+    print(f"Bloom filter for {count} entries: {bloom.nbytes / 2**20:.1f} MiB, "
+          f"{bloom._probes} probes -> {filter_file}")
+    return bloom
+
+
+class FilteredTable:
+    """The exact table behind a Bloom filter; misses never touch the table."""
+
+    def __init__(self, table, bloom: BloomFilter):
+        self.table = table
+        self.bloom = bloom
+        self.x_only = getattr(table, "x_only", False)
+        if bloom.x_only != self.x_only:
+            raise ValueError("Bloom filter and table disagree on x-only keying; rebuild the filter")
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, key):
+        return key_fingerprint(key, self.x_only) in self.bloom and key in self.table
+
+    def __getitem__(self, key):
+        return self.table[key]
+
+    def get(self, key, default=None):
+        if key_fingerprint(key, self.x_only) not in self.bloom:
+            return default
+        return self.table.get(key, default)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a Bloom filter for a precomputed table")
+    parser.add_argument("table", help="binary (bintable.py) or text table")
+    parser.add_argument("output", help="filter file to write")
+    parser.add_argument("--fp-rate", type=float, default=0.001,
+                        help="target false-positive rate (default 0.001)")
+    args = parser.parse_args()
+    build_filter(args.table, args.output, args.fp_rate)
@@ -0,0 +1,242 @@
+"""
+Baby-step giant-step search for k with k*G == target and LOW <= k <= HIGH.
+
+Baby steps: a table of j*G for j = 1..m, keyed by a 64-bit x fingerprint.
+Since j*G and -j*G share x, the table also answers -j for free.
+Giant steps: Q - c_i*G with c_i = LOW + m + i*(2m+1), i = 0, 1, ... If that
+point is +-j*G (or infinity, j = 0) then k = c_i +- j. Every giant step
+therefore covers the 2m+1 consecutive scalars [c_i - m, c_i + m], and after
+i finished giant steps the interval [LOW, LOW + i*(2m+1) - 1] is fully
+searched - not just sampled.
+
+The baby table can be written in the same "exp pubkey" text format that
+midd3.load_precomputed reads, and a contiguous table loaded that way can be
+reused directly (see baby_steps_from_table).
+"""
+
+import argparse
+import math
+import os
+import time
+import multiprocessing as mp
+from example import *
+import backend
+
+# Rough CPython cost of one int -> int dict entry (key, value, slot, resize slack)
+BABY_ENTRY_BYTES = 160
+
+
+def fingerprint(point) -> int:
+    """Top 64 bits of x; false positives are ruled out by verifying k."""
+    return point[0] >> 192
+
+
+def available_memory() -> int:
+    """Bytes of RAM currently available to this process (best effort)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def baby_steps_for_memory(memory_bytes: int, low: int = None, high: int = None) -> int:
+    """Number of baby steps that fit in memory_bytes.
+
+    With an interval given, the table is capped at ~sqrt((HIGH - LOW) / 2), where
+    total work (table + giant steps) is already minimal.
+    """
+    m = max(1, memory_bytes // BABY_ENTRY_BYTES)
+    if low is not None and high is not None:
+        m = min(m, math.isqrt((high - low) // 2) + 1)
+    return m
+
+
+def iter_baby_points(m: int, batch_size: int = 4096):
+    """Yield (j, j*G) for j = 1..m, one mixed addition + shared inversion each."""
+    current = JAC_INF
+    j = 0
+    while j < m:
+        block = []
+        for _ in range(min(batch_size, m - j)):
+            current = jacobian_add_affine(current, G)
+            block.append(current)
+        for point in jacobian_to_affine_batch(block):
+            j += 1
+            yield j, point
+
+
+def build_baby_steps(m: int):
+    """Return dict: fingerprint(j*G) -> j for j = 1..m."""
+    return {fingerprint(point): j for j, point in iter_baby_points(m)}
+
+
+def write_baby_steps(filename: str, m: int):
+    """Write j*G for j = 1..m as "j pubkey_hex" lines (load_precomputed format)."""
+    with open(filename, "w") as f:
+        for j, point in iter_baby_points(m):
+            f.write(f"{j} {compress_pubkey(point)}\n")
+
+
+def baby_steps_from_table(table):
+    """Convert a load_precomputed() dict into baby steps.
+
+    Only a contiguous table (exponents exactly 1..m) gives guaranteed coverage;
+    the random (gen_pubs.py) and d*16^k (gen_pubs2.py) tables do not qualify.
+    """
+    exps = sorted(table.values())
+    if exps != list(range(1, len(exps) + 1)):
+        raise ValueError("Table is not contiguous (exponents must be exactly 1..m)")
+    # Keys are 33-byte pubkeys or, from an x-only table, 32-byte x
+    return {int.from_bytes(key[-32:-24], "big"): exp for key, exp in table.items()}
+
+
+def giant_points(target_point, low: int, m: int, start: int, every: int = 1, batch_size: int = 256):
+    """Yield (i, Q - (low + m + i*(2m+1))*G) for i = start, start+every, ..."""
+    giant = 2 * m + 1
+    steps = scalar_mult_base_batch([t * every * giant for t in range(batch_size)])
+    block_step = backend.scalar_mult_base(batch_size * every * giant)
+    current = backend.subtract_points(target_point, backend.scalar_mult_base(low + m + start * giant))
+    i = start
+    while True:
+        points = point_sub_batch([(current, step) for step in steps] + [(current, block_step)])
+        current = points.pop()
+        for point in points:
+            yield i, point
+            i += every
+
+
+def bsgs_worker(target_pub_hex, low, high, baby_steps, stop_event, result_queue, progress,
+                worker_id, num_workers):
+    """
+    Worker process: giant steps i = worker_id, worker_id + num_workers, ...
+    progress[worker_id] holds the number of giant steps this worker finished.
+    If found, puts (k, r, exp) into result_queue, with r = the giant-step
+    scalar and exp = the signed baby step (k = r + exp), and sets stop_event.
+    """
+    target_point = decompress_pubkey(target_pub_hex)
+    m = len(baby_steps)
+    giant = 2 * m + 1
+    done = 0
+
+    for i, point in giant_points(target_point, low, m, worker_id, num_workers):
+        r = low + m + i * giant
+        if r - m > high or (done % 256 == 0 and stop_event.is_set()):
+            break
+        if point is INF:
+            exps = (0,)
+        else:
+            j = baby_steps.get(fingerprint(point))
+            exps = () if j is None else (j, -j)
+        for exp in exps:
+            if low <= r + exp <= high and backend.scalar_mult_base(r + exp) == target_point:
+                result_queue.put((r + exp, r, exp))
+                stop_event.set()
+                return
+        done += 1
+        progress[worker_id] = done
+
+
+def covered_high(progress, low: int, high: int, m: int) -> int:
+    """Largest K such that every scalar in [low, K] has been checked."""
+    num_workers = len(progress)
+    first_missing = min(w + progress[w] * num_workers for w in range(num_workers))
+    return min(high, low + first_missing * (2 * m + 1) - 1)
+
+
+def parallel_bsgs(target_pub_hex, low, high, baby_steps=None, memory_bytes=None,
+                  num_workers=4, report_every=10.0):
+    """
+    Parallel BSGS over [low, high].
+    baby_steps: prebuilt table (build_baby_steps / baby_steps_from_table); if None
+    one is built sized to memory_bytes (default: half of the available RAM).
+    Returns (k, r, exp) if found, else None. Prints guaranteed coverage as it goes.
+    """
+    if baby_steps is None:
+        if memory_bytes is None:
+            memory_bytes = available_memory() // 2
+        m = baby_steps_for_memory(memory_bytes, low, high)
+        print(f"Building {m} baby steps...")
+        baby_steps = build_baby_steps(m)
+    m = len(baby_steps)
+    print(f"Baby steps: {m}, giant step: {2 * m + 1}, "
+          f"giant steps needed: {(high - low) // (2 * m + 1) + 1}")
+
+    prepare_fixed_base()
+
+    stop_event = mp.Event()
+    result_queue = mp.Queue()
+    progress = mp.Array('q', num_workers, lock=False)
+
+    processes = []
+    for i in range(num_workers):
+        p = mp.Process(target=bsgs_worker,
+                       args=(target_pub_hex, low, high, baby_steps, stop_event,
+                             result_queue, progress, i, num_workers))
+        p.start()
+        processes.append(p)
+
+    start_time = time.time()
+    last_report = start_time
+    try:
+        while True:
+            try:
+                result = result_queue.get(timeout=0.1)
+                stop_event.set()
+                return result
+            except mp.queues.Empty:
+                pass
+
+            now = time.time()
+            if now - last_report >= report_every:
+                last_report = now
+                covered = covered_high(progress, low, high, m)
+                frac = (covered - low + 1) / (high - low + 1)
+                print(f"Covered [{low}, {covered}] ({frac:.4%}) after {now - start_time:.0f}s")
+
+            if not any(p.is_alive() for p in processes):
+                break
+
+        # All workers finished, check queue one last time
+        if not result_queue.empty():
+            return result_queue.get()
+        covered = covered_high(progress, low, high, m)
+        print(f"Covered [{low}, {covered}] - k is not in this interval")
+        return None
+
+    except KeyboardInterrupt:
+        print("Interrupted, stopping workers...")
+        stop_event.set()
+        covered = covered_high(progress, low, high, m)
+        print(f"Covered [{low}, {covered}] before the interrupt")
+        return None
+    finally:
+        for p in processes:
+            p.join(timeout=1)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+
+
+if __name__ == "__main__":
+    target = "02145d2611c823a396ef6712ce0f712f09b9b4f3135e3e0aa3230fb9b6d08d1e16"
+    HIGH = 43556142965880123323311949751266331066368
+    LOW = 21778071482940061661655974875633165533184
+
+    parser = argparse.ArgumentParser(description="Parallel baby-step giant-step search")
+    parser.add_argument("--workers", type=int, default=mp.cpu_count())
+    backend.add_backend_argument(parser)
+    args = parser.parse_args()
+    print(f"EC backend: {backend.use_backend(args.backend).name}")
+
+    print(f"Starting BSGS with {args.workers} workers...")
+    result = parallel_bsgs(target, LOW, HIGH, num_workers=args.workers)
+
+    if result:
+        k, r, exp = result
+        print(f"\nSUCCESS: k = {k} (giant = {r}, baby = {exp})")
+    else:
+        print("\nNo match found.")
@@ -0,0 +1,55 @@
+"""
+Search checkpoints: a small JSON state file that lets a long parallel search
+survive Ctrl-C or a reboot and continue where it stopped.
+
+The file records the search parameters, total elapsed time and, per worker,
+the attempts done plus whatever the worker needs to continue without
+repeating candidates (its RNG state and, in scan mode, its walk cursor).
+"""
+
+import json
+import os
+
+
+def save_state(filename: str, state):
+    """Write state atomically (a crash mid-write leaves the previous file intact)."""
+    tmp = filename + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+
+def check_overwrite(filename: str, resume: bool, overwrite: bool = False):
+    """Refuse to start a new search over an existing checkpoint unless told to."""
+    if filename and not resume and not overwrite and os.path.exists(filename):
+        raise FileExistsError(f"{filename} holds a saved search; continue it with --resume "
+                              f"or start over with --fresh")
+
+
+def load_state(filename: str):
+    """Return the saved state, or None if there is no checkpoint."""
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def rng_state_to_json(state):
+    version, internal, gauss = state
+    return [version, list(internal), gauss]
+
+
+def rng_state_from_json(data):
+    version, internal, gauss = data
+    return (version, tuple(internal), gauss)
+
+
+def check_params(state, params, filename: str):
+    """Refuse to resume a checkpoint written for a different search."""
+    saved = state.get("params", {})
+    diff = sorted(key for key in set(saved) | set(params) if saved.get(key) != params.get(key))
+    if diff:
+        raise ValueError(f"{filename} belongs to a different search (differs in: {', '.join(diff)})")
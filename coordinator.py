@@ -0,0 +1,493 @@
+"""
+Distributed search: one coordinator and any number of worker nodes, talking
+newline-delimited JSON over TCP (stdlib sockets only, no outside services).
+
+    python coordinator.py serve --port 7000 --mode range
+    python coordinator.py node --host 10.0.0.1 --port 7000 --table precomputed.bin
+
+Range mode: the r lattice low + j*stride in [LOW, HIGH] is cut into disjoint
+chunks. A node scans each chunk it gets completely (midd3.worker in scan
+mode, split over its local processes) and reports it done, so the
+coordinator knows exactly how much of the interval is covered. If any
+local process exits with a non-zero code (killed, crashed), the node
+reports the chunk failed instead; it goes back to the queue and the node
+exits.
+Kangaroo mode: nodes run kangaroo.kangaroo_worker herds and forward their
+distinguished points. The coordinator keeps the single DP store, detects
+tame/wild collisions and tells nodes which kangaroos to restart.
+
+Nodes send a heartbeat with their throughput every few seconds. A node that
+stays silent for node_timeout seconds is dropped and its unfinished chunks
+go back to the front of the queue.
+
+Messages (node -> coordinator; every message gets exactly one reply):
+    hello      {node, workers}                    -> welcome {job}
+    request    {node}                             -> assign {chunk, low, high} | herd {herd} | wait | stop
+    heartbeat  {node, attempts, keys_per_sec}     -> ok | stop
+    done       {node, chunk, attempts, keys_per_sec} -> ok | stop
+    failed     {node, chunk, exitcodes}           -> ok | stop
+    dps        {node, points: [[herd, kind, x, dist, index], ...]}
+                                                  -> ok {restart: [[herd, index], ...]} | stop
+    found      {node, k, r, exp}                  -> stop
+"""
+
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+import multiprocessing as mp
+from collections import deque
+from example import *
+from kangaroo import TAME, jump_distances, default_dp_bits, kangaroo_worker
+from metrics import create_counters, read_rows, ATTEMPTS
+
+DEFAULT_PORT = 7000
+
+
+def encode(msg) -> bytes:
+    return (json.dumps(msg) + "\n").encode()
+
+
+class Coordinator:
+    """Work bookkeeping for one search; handle() is called from the server threads."""
+
+    def __init__(self, target_pub_hex, low, high, mode="range", chunk_size=2**24, stride=1,
+                 batch_size=1024, herd_size=32, herds=8, dp_bits=None, node_timeout=30.0):
+        self.target_point = decompress_pubkey(target_pub_hex)
+        self.low, self.high = low, high
+        self.mode = mode
+        self.node_timeout = node_timeout
+        self.lock = threading.Lock()
+        self.nodes = {}         # node -> {"last_seen", "attempts", "keys_per_sec", "chunks"}
+        self.result = None
+        self.finished = threading.Event()
+        self.job = {"target": target_pub_hex, "low": low, "high": high, "mode": mode}
+
+        if mode == "range":
+            # Chunks are runs of chunk_size lattice points r = low + j*stride, handed
+            # out lazily: chunk ids below next_chunk are assigned, requeued or done.
+            self.stride = stride
+            self.count = (high - low) // stride + 1
+            self.chunk_size = chunk_size
+            self.num_chunks = -(-self.count // chunk_size)
+            self.next_chunk = 0
+            self.requeued = deque()     # chunks handed back by reap() / "failed"
+            self.assigned = {}          # chunk -> node
+            self.done_chunks = 0
+            self.done_count = 0         # lattice points in finished chunks
+            self.job.update(stride=stride, batch_size=batch_size)
+        elif mode == "kangaroo":
+            width = high - low
+            num_kangaroos = 2 * herd_size * herds
+            if dp_bits is None:
+                dp_bits = default_dp_bits(width, num_kangaroos)
+            self.next_herd = 0
+            self.store = {}         # x -> (kind, dist)
+            self.job.update(jumps=jump_distances(width, num_kangaroos), dp_bits=dp_bits,
+                            herd_size=herd_size)
+        else:
+            raise ValueError(f"Unknown coordinator mode: {mode}")
+
+    def _chunk_count(self, chunk: int) -> int:
+        return min(self.chunk_size, self.count - chunk * self.chunk_size)
+
+    def chunk_bounds(self, chunk: int):
+        """(first r, last r) of a chunk; both lie on the stride lattice."""
+        first = self.low + chunk * self.chunk_size * self.stride
+        return first, first + (self._chunk_count(chunk) - 1) * self.stride
+
+    def covered(self) -> float:
+        """Exact fraction of the r lattice in [low, high] whose chunks are finished."""
+        return self.done_count / self.count
+
+    def handle(self, msg):
+        reply = self._handle(msg)
+        if reply["type"] == "stop":
+            with self.lock:
+                self.nodes[msg.get("node")]["stopped"] = True
+        return reply
+
+    def _handle(self, msg):
+        with self.lock:
+            node = msg.get("node")
+            info = self.nodes.setdefault(node, {"attempts": 0, "keys_per_sec": 0.0, "chunks": set()})
+            info["last_seen"] = time.time()
+            kind = msg.get("type")
+            if kind == "hello":
+                return {"type": "welcome", "job": self.job}
+            if kind == "found":
+                self._found(msg["k"], msg.get("r"), msg.get("exp"))
+                return {"type": "stop"}
+            if self.finished.is_set():
+                return {"type": "stop"}
+            if kind == "request":
+                return self._request(node, info)
+            if "keys_per_sec" in msg:
+                info["attempts"] = msg.get("attempts", 0)
+                info["keys_per_sec"] = msg["keys_per_sec"]
+            if kind == "heartbeat":
+                return {"type": "ok"}
+            if kind == "done":
+                self._chunk_done(node, msg["chunk"])
+                return {"type": "stop"} if self.finished.is_set() else {"type": "ok"}
+            if kind == "failed":
+                self._chunk_failed(node, msg["chunk"], msg.get("exitcodes"))
+                return {"type": "ok"}
+            if kind == "dps":
+                restart = self._add_dps(msg["points"])
+                return {"type": "stop"} if self.finished.is_set() else {"type": "ok", "restart": restart}
+            return {"type": "error", "error": f"unknown message type {kind!r}"}
+
+    def _request(self, node, info):
+        if self.mode == "kangaroo":
+            self.next_herd += 1
+            return {"type": "herd", "herd": self.next_herd - 1}
+        if self.requeued or self.next_chunk < self.num_chunks:
+            if self.requeued:
+                chunk = self.requeued.popleft()
+            else:
+                chunk = self.next_chunk
+                self.next_chunk += 1
+            self.assigned[chunk] = node
+            info["chunks"].add(chunk)
+            lo, hi = self.chunk_bounds(chunk)
+            return {"type": "assign", "chunk": chunk, "low": lo, "high": hi}
+        if self.assigned:
+            return {"type": "wait", "retry": 1.0}    # the rest is in progress elsewhere
+        return {"type": "stop"}
+
+    def _chunk_done(self, node, chunk):
+        self.nodes[node]["chunks"].discard(chunk)
+        if chunk in self.assigned:
+            del self.assigned[chunk]
+        elif chunk in self.requeued:
+            self.requeued.remove(chunk)     # a timed-out node finished it after all
+        else:
+            return                          # already counted
+        self.done_chunks += 1
+        self.done_count += self._chunk_count(chunk)
+        if self.done_chunks == self.num_chunks:
+            print(f"All {self.num_chunks} chunks searched, no match in [{self.low}, {self.high}]")
+            self.finished.set()
+
+    def _chunk_failed(self, node, chunk, exitcodes):
+        """A node's local worker died: the chunk is not covered, so it goes back to the front."""
+        self.nodes[node]["chunks"].discard(chunk)
+        if self.assigned.get(chunk) != node:
+            return
+        del self.assigned[chunk]
+        self.requeued.appendleft(chunk)
+        print(f"Node {node}: workers failed on chunk {chunk} (exit codes {exitcodes}), requeued")
+
+    def _add_dps(self, points):
+        restart = []
+        for herd, kind, x, dist, index in points:
+            seen = self.store.get(x)
+            if seen is None:
+                self.store[x] = (kind, dist)
+                continue
+            seen_kind, seen_dist = seen
+            if seen_kind == kind:
+                restart.append([herd, index])
+                continue
+            a, b = (dist, seen_dist) if kind == TAME else (seen_dist, dist)
+            if self._found((a - b) % N_ORDER, a, b):
+                break
+        return restart
+
+    def _found(self, k, r, exp):
+        if self.result is None and scalar_mult_base(k) == self.target_point:
+            self.result = (k, r, exp)
+            self.finished.set()
+        return self.result is not None
+
+    def reap(self):
+        """Drop nodes that missed their heartbeats and requeue their chunks."""
+        with self.lock:
+            now = time.time()
+            for node, info in list(self.nodes.items()):
+                if now - info["last_seen"] < self.node_timeout:
+                    continue
+                lost = sorted(c for c in info["chunks"] if self.assigned.get(c) == node)
+                for chunk in reversed(lost):
+                    del self.assigned[chunk]
+                    self.requeued.appendleft(chunk)
+                del self.nodes[node]
+                print(f"Node {node} timed out" + (f", requeued chunks {lost}" if lost else ""))
+
+    def report(self):
+        with self.lock:
+            rate = sum(info["keys_per_sec"] for info in self.nodes.values())
+            line = f"{len(self.nodes)} nodes, {rate:,.0f} keys/s"
+            if self.mode == "range":
+                line += (f", {self.done_chunks}/{self.num_chunks} chunks done "
+                         f"({self.covered():.4%} covered), {len(self.assigned)} in progress")
+            else:
+                line += f", {self.next_herd} herds, {len(self.store)} distinguished points"
+        print(line)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        coordinator = self.server.coordinator
+        for line in self.rfile:
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                break
+            self.wfile.write(encode(coordinator.handle(msg)))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve(coordinator, host="0.0.0.0", port=DEFAULT_PORT):
+    """Start the TCP server in a background thread; port 0 picks a free port."""
+    server = _Server((host, port), _Handler)
+    server.coordinator = coordinator
+    threading.Thread(target=server.serve_forever, name="coordinator", daemon=True).start()
+    return server
+
+
+def run_coordinator(coordinator, host="0.0.0.0", port=DEFAULT_PORT, report_every=10.0, grace=10.0):
+    """Serve until the key is found or the interval is exhausted. Returns (k, r, exp) or None."""
+    server = serve(coordinator, host, port)
+    print(f"Coordinator listening on {server.server_address[0]}:{server.server_address[1]} "
+          f"({coordinator.mode} mode)")
+    last_report = time.time()
+    try:
+        while not coordinator.finished.wait(0.5):
+            coordinator.reap()
+            if time.time() - last_report >= report_every:
+                coordinator.report()
+                last_report = time.time()
+        # Let connected nodes pick up their "stop" before the server goes away
+        deadline = time.time() + grace
+        while time.time() < deadline and not all(info.get("stopped")
+                                                 for info in list(coordinator.nodes.values())):
+            time.sleep(0.2)
+            coordinator.reap()
+    except KeyboardInterrupt:
+        print("Interrupted.")
+    finally:
+        coordinator.report()
+        server.shutdown()
+        server.server_close()
+    return coordinator.result
+
+
+# ---------- Node side ----------
+
+class Connection:
+    """One persistent connection to the coordinator; call() sends a message and returns the reply."""
+
+    def __init__(self, host, port, node, timeout=60.0):
+        self.node = node
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile("rwb")
+
+    def call(self, kind, **fields):
+        self._file.write(encode(dict(fields, type=kind, node=self.node)))
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("coordinator closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+def _stop_processes(processes, stop_event):
+    stop_event.set()
+    for p in processes:
+        p.join(timeout=2)
+        if p.is_alive():
+            p.terminate()
+            p.join()
+
+
+def _scan_chunk(conn, job, table, assignment, num_workers, heartbeat_every):
+    """Scan one chunk completely with local worker processes; returns the coordinator's last
+    reply type, or "failed" when a local worker died (the chunk is then handed back)."""
+    import midd3
+
+    stride, lo, hi = job["stride"], assignment["low"], assignment["high"]
+    count = (hi - lo) // stride + 1
+    per_worker = -(-count // num_workers)
+    stop_event = mp.Event()
+    result_queue = mp.Queue()
+    counters = create_counters(num_workers)
+    processes = []
+    for i in range(num_workers):
+        n = min(per_worker, count - i * per_worker)
+        if n <= 0:
+            break
+        r_start = lo + i * per_worker * stride
+        p = mp.Process(target=midd3.worker,
+                       args=(job["target"], r_start, r_start + (n - 1) * stride, table,
+                             stop_event, result_queue, i, n, job["batch_size"], "scan", stride,
+                             None, {"attempts": 0, "r_base": r_start}, 5.0, counters))
+        p.start()
+        processes.append(p)
+
+    start = last_beat = time.time()
+    last_attempts = 0
+    try:
+        while True:
+            try:
+                k, r, exp = result_queue.get(timeout=0.2)
+                return conn.call("found", k=k, r=r, exp=exp)["type"]
+            except queue.Empty:
+                pass
+            if not any(p.is_alive() for p in processes) and result_queue.empty():
+                exitcodes = [p.exitcode for p in processes]
+                if any(code != 0 for code in exitcodes):
+                    # Killed (e.g. OOM) or crashed: its part of the chunk was not searched
+                    conn.call("failed", chunk=assignment["chunk"], exitcodes=exitcodes)
+                    return "failed"
+                return conn.call("done", chunk=assignment["chunk"], attempts=count,
+                                 keys_per_sec=count / (time.time() - start))["type"]
+            now = time.time()
+            if now - last_beat >= heartbeat_every:
+                attempts = sum(row[ATTEMPTS] for row in read_rows(counters))
+                reply = conn.call("heartbeat", attempts=attempts,
+                                  keys_per_sec=(attempts - last_attempts) / (now - last_beat))
+                last_beat, last_attempts = now, attempts
+                if reply["type"] == "stop":
+                    return "stop"
+    finally:
+        _stop_processes(processes, stop_event)
+
+
+def _run_herds(conn, job, num_workers, heartbeat_every):
+    """Run num_workers kangaroo herds and forward their distinguished points."""
+    herds = [conn.call("request")["herd"] for _ in range(num_workers)]
+    local = {herd: i for i, herd in enumerate(herds)}
+    stop_event = mp.Event()
+    dp_queue = mp.Queue()
+    control_queues = [mp.Queue() for _ in herds]
+    processes = []
+    for i in range(len(herds)):
+        p = mp.Process(target=kangaroo_worker,
+                       args=(job["target"], job["low"], job["high"], job["jumps"], job["dp_bits"],
+                             job["herd_size"], stop_event, dp_queue, control_queues[i], i))
+        p.start()
+        processes.append(p)
+
+    last_beat = time.time()
+    sent = 0
+    try:
+        while any(p.is_alive() for p in processes):
+            try:
+                batch = dp_queue.get(timeout=0.2)
+            except queue.Empty:
+                batch = []
+            if batch:
+                points = [[herds[w], kind, x, dist, index] for kind, x, dist, w, index in batch]
+                reply = conn.call("dps", points=points)
+                sent += len(points)
+                if reply["type"] == "stop":
+                    return
+                for herd, index in reply.get("restart", []):
+                    control_queues[local[herd]].put(index)
+            if time.time() - last_beat >= heartbeat_every:
+                if conn.call("heartbeat", attempts=sent, keys_per_sec=0.0)["type"] == "stop":
+                    return
+                last_beat = time.time()
+    finally:
+        _stop_processes(processes, stop_event)
+
+
+def run_node(host, port=DEFAULT_PORT, table_file=None, bloom_file=None, num_workers=None,
+             node=None, heartbeat_every=5.0):
+    """Work for the coordinator at host:port until it says stop."""
+    num_workers = num_workers or mp.cpu_count()
+    node = node or f"{socket.gethostname()}:{os.getpid()}"
+    conn = Connection(host, port, node)
+    job = conn.call("hello", workers=num_workers)["job"]
+    print(f"Node {node}: {job['mode']} job on [{job['low']}, {job['high']}] with {num_workers} workers")
+
+    prepare_fixed_base()
+    shared_table = None
+    try:
+        if job["mode"] == "kangaroo":
+            _run_herds(conn, job, num_workers, heartbeat_every)
+            return
+        from midd3 import load_table
+        from bintable import SharedTable
+        table = load_table(table_file, bloom_file)
+        shared_table = SharedTable.from_table(table)
+        if shared_table is not None:
+            table = shared_table
+        while True:
+            reply = conn.call("request")
+            if reply["type"] == "wait":
+                time.sleep(reply.get("retry", 1.0))
+                continue
+            if reply["type"] != "assign":
+                return
+            print(f"Node {node}: chunk {reply['chunk']} [{reply['low']}, {reply['high']}]")
+            status = _scan_chunk(conn, job, table, reply, num_workers, heartbeat_every)
+            if status == "failed":
+                print(f"Node {node}: local workers failed on chunk {reply['chunk']}, "
+                      f"handed it back and exiting")
+            if status in ("stop", "failed"):
+                return
+    except ConnectionError as e:
+        print(f"Node {node}: lost the coordinator ({e}), exiting")
+    finally:
+        conn.close()
+        if shared_table is not None:
+            shared_table.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed search coordinator / worker node")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    srv = sub.add_parser("serve", help="run the coordinator")
+    srv.add_argument("--host", default="0.0.0.0")
+    srv.add_argument("--port", type=int, default=DEFAULT_PORT)
+    srv.add_argument("--target", default="02145d2611c823a396ef6712ce0f712f09b9b4f3135e3e0aa3230fb9b6d08d1e16")
+    srv.add_argument("--low", type=int, default=21778071482940061661655974875633165533184)
+    srv.add_argument("--high", type=int, default=43556142965880123323311949751266331066368)
+    srv.add_argument("--mode", choices=("range", "kangaroo"), default="range")
+    srv.add_argument("--chunk-size", type=int, default=2**24, help="lattice points r per chunk (range mode)")
+    srv.add_argument("--stride", type=int, default=1)
+    srv.add_argument("--batch-size", type=int, default=1024)
+    srv.add_argument("--herd-size", type=int, default=32)
+    srv.add_argument("--herds", type=int, default=8, help="expected concurrent herds (sizes the jumps)")
+    srv.add_argument("--dp-bits", type=int, default=None)
+    srv.add_argument("--node-timeout", type=float, default=30.0)
+    srv.add_argument("--report-interval", type=float, default=10.0)
+
+    nd = sub.add_parser("node", help="run a worker node")
+    nd.add_argument("--host", default="127.0.0.1")
+    nd.add_argument("--port", type=int, default=DEFAULT_PORT)
+    nd.add_argument("--table", default="precomputed_hex.txt", help="range mode: precomputed table")
+    nd.add_argument("--bloom", default=None)
+    nd.add_argument("--workers", type=int, default=mp.cpu_count())
+    nd.add_argument("--name", default=None)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        coordinator = Coordinator(args.target, args.low, args.high, args.mode, args.chunk_size,
+                                  args.stride, args.batch_size, args.herd_size, args.herds,
+                                  args.dp_bits, args.node_timeout)
+        result = run_coordinator(coordinator, args.host, args.port, args.report_interval)
+        if result:
+            k, r, exp = result
+            print(f"\nSUCCESS: k = {k} (r = {r}, exponent = {exp})")
+        else:
+            print("\nNo match found.")
+    else:
+        run_node(args.host, args.port, args.table, args.bloom, args.workers, args.name)
@@ -6,9 +6,19 @@ Use this file to experiment with:
 - point subtraction: P - Q
 - scalar multiplication: k * G
 
-This is a pure-Python educational implementation (not optimized).
+k * G uses a fixed-base window table built once per process (see
+fixed_base_table(), which can also be cached on disk). For other points,
+scalar_mult_glv() splits k with the GLV endomorphism and is ~1.6x faster
+than plain scalar_mult().
+
+This is a pure-Python educational implementation. Scalar multiplication
+runs in Jacobian coordinates internally; the tuple-based affine functions
+below remain the public facade.
 """
 
+import os
+import random
+
 P_FIELD = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
 N_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
 Gx = 55066263022277343669578718895168534326250603453777594175500187360389116729240
@@ -60,24 +70,397 @@ def point_add(a, b):
     return (x3, y3)
 
 
-def scalar_mult(k: int, point=G):
-    if point is INF or k % N_ORDER == 0:
+# ---------- Jacobian coordinates ----------
+# A Jacobian point (X, Y, Z) stands for the affine point (X/Z^2, Y/Z^3).
+# Adds and doubles need no inversion; convert back with from_jacobian()
+# once, when the affine coordinates are actually needed.
+
+JAC_INF = (1, 1, 0)
+
+
+def to_jacobian(point):
+    if point is INF:
+        return JAC_INF
+    x, y = point
+    return (x, y, 1)
+
+
+def from_jacobian(jp):
+    X, Y, Z = jp
+    if Z == 0:
         return INF
+    z_inv = mod_inv(Z, P_FIELD)
+    z_inv2 = z_inv * z_inv % P_FIELD
+    return (X * z_inv2 % P_FIELD, Y * z_inv2 * z_inv % P_FIELD)
+
+
+def jacobian_neg(jp):
+    X, Y, Z = jp
+    return (X, (-Y) % P_FIELD, Z)
+
+
+def jacobian_double(jp):
+    X1, Y1, Z1 = jp
+    if Z1 == 0 or Y1 == 0:
+        return JAC_INF
+    # dbl-2009-l (a = 0)
+    A = X1 * X1 % P_FIELD
+    B = Y1 * Y1 % P_FIELD
+    C = B * B % P_FIELD
+    D = 2 * ((X1 + B) * (X1 + B) - A - C) % P_FIELD
+    E = 3 * A
+    F = E * E % P_FIELD
+    X3 = (F - 2 * D) % P_FIELD
+    Y3 = (E * (D - X3) - 8 * C) % P_FIELD
+    Z3 = 2 * Y1 * Z1 % P_FIELD
+    return (X3, Y3, Z3)
+
+
+def jacobian_add(jp, jq):
+    X1, Y1, Z1 = jp
+    X2, Y2, Z2 = jq
+    if Z1 == 0:
+        return jq
+    if Z2 == 0:
+        return jp
+
+    Z1Z1 = Z1 * Z1 % P_FIELD
+    Z2Z2 = Z2 * Z2 % P_FIELD
+    U1 = X1 * Z2Z2 % P_FIELD
+    U2 = X2 * Z1Z1 % P_FIELD
+    S1 = Y1 * Z2 * Z2Z2 % P_FIELD
+    S2 = Y2 * Z1 * Z1Z1 % P_FIELD
+
+    H = (U2 - U1) % P_FIELD
+    R = (S2 - S1) % P_FIELD
+    if H == 0:
+        if R == 0:
+            return jacobian_double(jp)
+        return JAC_INF
+
+    HH = H * H % P_FIELD
+    HHH = H * HH % P_FIELD
+    V = U1 * HH % P_FIELD
+    X3 = (R * R - HHH - 2 * V) % P_FIELD
+    Y3 = (R * (V - X3) - S1 * HHH) % P_FIELD
+    Z3 = Z1 * Z2 * H % P_FIELD
+    return (X3, Y3, Z3)
+
+
+def jacobian_add_affine(jp, point):
+    """Mixed addition: Jacobian jp + affine point (Z2 == 1)."""
+    if point is INF:
+        return jp
+    X1, Y1, Z1 = jp
+    x2, y2 = point
+    if Z1 == 0:
+        return (x2, y2, 1)
+
+    Z1Z1 = Z1 * Z1 % P_FIELD
+    U2 = x2 * Z1Z1 % P_FIELD
+    S2 = y2 * Z1 * Z1Z1 % P_FIELD
+
+    H = (U2 - X1) % P_FIELD
+    R = (S2 - Y1) % P_FIELD
+    if H == 0:
+        if R == 0:
+            return jacobian_double(jp)
+        return JAC_INF
+
+    HH = H * H % P_FIELD
+    HHH = H * HH % P_FIELD
+    V = X1 * HH % P_FIELD
+    X3 = (R * R - HHH - 2 * V) % P_FIELD
+    Y3 = (R * (V - X3) - Y1 * HHH) % P_FIELD
+    Z3 = Z1 * H % P_FIELD
+    return (X3, Y3, Z3)
+
+
+def scalar_mult_jacobian(k: int, point=G):
+    """k * point, returned in Jacobian coordinates (no inversions)."""
+    if point is INF or k % N_ORDER == 0:
+        return JAC_INF
+    if point == G:
+        return scalar_mult_base_jacobian(k)
     if k < 0:
-        return scalar_mult(-k, point_neg(point))
+        k, point = -k, point_neg(point)
+
+    # Left-to-right double-and-add; additions stay mixed since point is affine.
+    result = JAC_INF
+    for bit in bin(k)[2:]:
+        result = jacobian_double(result)
+        if bit == "1":
+            result = jacobian_add_affine(result, point)
+    return result
 
-    result = INF
-    addend = point
 
-    while k:
-        if k & 1:
-            result = point_add(result, addend)
-        addend = point_add(addend, addend)
-        k >>= 1
+def scalar_mult(k: int, point=G):
+    return from_jacobian(scalar_mult_jacobian(k, point))
+
+
+# ---------- GLV endomorphism ----------
+# secp256k1 has phi(x, y) = (BETA*x, y) == LAMBDA * (x, y). Writing
+# k = k1 + k2*LAMBDA (mod n) with |k1|, |k2| ~ 2^128 turns k*P into
+# k1*P + k2*phi(P), evaluated together: half the doublings of scalar_mult.
+
+BETA = 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE
+LAMBDA = 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72
+# Short lattice basis (a1, b1), (a2, b2) with a + b*LAMBDA == 0 (mod n)
+_GLV_A1 = 0x3086D221A7D46BCDE86C90E49284EB15
+_GLV_B1 = -0xE4437ED6010E88286F547FA90ABFE4C3
+_GLV_A2 = 0x114CA50F7A8E2F3F657C1108D9D44CFD8
+_GLV_B2 = _GLV_A1
+
+
+def point_endomorphism(point):
+    """phi(P) = LAMBDA * P, for the price of one field multiplication."""
+    if point is INF:
+        return INF
+    x, y = point
+    return (BETA * x % P_FIELD, y)
+
+
+def glv_decompose(k: int):
+    """Return (k1, k2) with k == k1 + k2*LAMBDA (mod n) and |k1|, |k2| < ~2^128."""
+    k %= N_ORDER
+    half = N_ORDER // 2
+    c1 = (_GLV_B2 * k + half) // N_ORDER
+    c2 = (-_GLV_B1 * k + half) // N_ORDER
+    k1 = k - c1 * _GLV_A1 - c2 * _GLV_A2
+    k2 = -c1 * _GLV_B1 - c2 * _GLV_B2
+    return k1, k2
+
 
+def scalar_mult_glv_jacobian(k: int, point=G):
+    """k * point via GLV + Shamir's trick, in Jacobian coordinates."""
+    if point is INF or k % N_ORDER == 0:
+        return JAC_INF
+    k1, k2 = glv_decompose(k)
+    p1 = point if k1 >= 0 else point_neg(point)
+    p2 = point_endomorphism(point)
+    if k2 < 0:
+        p2 = point_neg(p2)
+    k1, k2 = abs(k1), abs(k2)
+    p12 = point_add(p1, p2)
+    addends = (None, p1, p2, p12)
+
+    result = JAC_INF
+    for i in range(max(k1.bit_length(), k2.bit_length()) - 1, -1, -1):
+        result = jacobian_double(result)
+        addend = addends[((k1 >> i) & 1) | (((k2 >> i) & 1) << 1)]
+        if addend is not None:
+            result = jacobian_add_affine(result, addend)
     return result
 
 
+def scalar_mult_glv(k: int, point=G):
+    return from_jacobian(scalar_mult_glv_jacobian(k, point))
+
+
+def check_glv(n: int = 50, seed: int = 7):
+    """Compare scalar_mult_glv with scalar_mult on random and edge-case inputs."""
+    rng = random.Random(seed)
+    points = [scalar_mult(rng.randrange(1, N_ORDER)) for _ in range(n)] + [G]
+    edge = [0, 1, 2, N_ORDER - 1, N_ORDER, N_ORDER + 1, -1, -5, LAMBDA, N_ORDER - LAMBDA,
+            1 << 128, (1 << 128) - 1]
+    for point in points:
+        for k in edge + [rng.randrange(N_ORDER), -rng.randrange(N_ORDER)]:
+            got, want = scalar_mult_glv(k, point), scalar_mult(k, point)
+            if got != want:
+                raise AssertionError(f"scalar_mult_glv({k}, {point}): {got!r} != {want!r}")
+    for k in edge:
+        if scalar_mult_glv(k, INF) is not INF:
+            raise AssertionError(f"scalar_mult_glv({k}, INF) is not INF")
+    return True
+
+
+# ---------- Fixed-base table for k * G ----------
+# Row i holds j * 2^(w*i) * G for j = 1..2^w - 1 (affine), so k * G is one
+# mixed addition per w-bit window of k and no doublings at all.
+
+FIXED_BASE_WINDOW = 8
+_FIXED_BASE_MAGIC = b"MOJOFB1"
+_fixed_base_table = None
+
+
+def build_fixed_base_table(window: int = FIXED_BASE_WINDOW):
+    rows = (N_ORDER.bit_length() + window - 1) // window
+    table = []
+    base = G
+    for _ in range(rows):
+        row = [base]
+        for _ in range((1 << window) - 2):
+            row.append(point_add(row[-1], base))
+        table.append(row)
+        base = point_add(row[-1], base)  # 2^w * base
+    return table
+
+
+def save_fixed_base_table(filename: str, table=None):
+    table = table if table is not None else fixed_base_table()
+    window = (len(table[0]) + 1).bit_length() - 1
+    with open(filename, "wb") as f:
+        f.write(_FIXED_BASE_MAGIC + bytes([window]) + len(table).to_bytes(2, "big"))
+        for row in table:
+            f.write(b"".join(x.to_bytes(32, "big") + y.to_bytes(32, "big") for x, y in row))
+
+
+def load_fixed_base_table(filename: str):
+    with open(filename, "rb") as f:
+        data = f.read()
+    head = len(_FIXED_BASE_MAGIC)
+    if data[:head] != _FIXED_BASE_MAGIC:
+        raise ValueError(f"{filename} is not a fixed-base table file")
+    window = data[head]
+    rows = int.from_bytes(data[head + 1:head + 3], "big")
+    per_row = (1 << window) - 1
+    if len(data) != head + 3 + rows * per_row * 64:
+        raise ValueError(f"{filename} is truncated or corrupt")
+
+    table = []
+    pos = head + 3
+    for _ in range(rows):
+        row = []
+        for _ in range(per_row):
+            row.append((int.from_bytes(data[pos:pos + 32], "big"),
+                        int.from_bytes(data[pos + 32:pos + 64], "big")))
+            pos += 64
+        table.append(row)
+    if table[0][0] != G:
+        raise ValueError(f"{filename} does not start with G")
+    return table
+
+
+def fixed_base_table(filename: str = None):
+    """Return the process-wide k*G table, building it on first use.
+
+    With a filename the table is loaded from disk if present, otherwise
+    built and saved there for the next process.
+    """
+    global _fixed_base_table
+    if _fixed_base_table is None:
+        if filename and os.path.exists(filename):
+            _fixed_base_table = load_fixed_base_table(filename)
+        else:
+            _fixed_base_table = build_fixed_base_table()
+            if filename:
+                save_fixed_base_table(filename, _fixed_base_table)
+    return _fixed_base_table
+
+
+def prepare_fixed_base():
+    """Build the k*G table in the parent before starting worker processes.
+
+    Forked workers then inherit the finished table instead of each building
+    its own copy on first use.
+    """
+    fixed_base_table()
+
+
+def scalar_mult_base_jacobian(k: int):
+    """k * G via the fixed-base table, in Jacobian coordinates."""
+    k %= N_ORDER
+    table = fixed_base_table()
+    window = (len(table[0]) + 1).bit_length() - 1
+    mask = (1 << window) - 1
+
+    result = JAC_INF
+    i = 0
+    while k:
+        digit = k & mask
+        if digit:
+            result = jacobian_add_affine(result, table[i][digit - 1])
+        k >>= window
+        i += 1
+    return result
+
+
+def scalar_mult_base(k: int):
+    return from_jacobian(scalar_mult_base_jacobian(k))
+
+
+# ---------- Batched operations (Montgomery's simultaneous inversion) ----------
+
+def batch_inv(values, m: int = P_FIELD):
+    """Invert every value mod m with a single modular inversion.
+
+    Montgomery's trick: 3(n-1) multiplications plus one pow(., -1, m)
+    instead of n inversions. All values must be non-zero mod m.
+    """
+    n = len(values)
+    if n == 0:
+        return []
+    prefix = [0] * n
+    acc = 1
+    for i, v in enumerate(values):
+        prefix[i] = acc
+        acc = acc * v % m
+    inv = mod_inv(acc, m)
+    out = [0] * n
+    for i in range(n - 1, -1, -1):
+        out[i] = inv * prefix[i] % m
+        inv = inv * values[i] % m
+    return out
+
+
+def jacobian_to_affine_batch(jps):
+    """Convert many Jacobian points to affine with one shared inversion."""
+    idx = [i for i, jp in enumerate(jps) if jp[2] % P_FIELD]
+    invs = batch_inv([jps[i][2] for i in idx])
+    out = [INF] * len(jps)
+    for i, z_inv in zip(idx, invs):
+        X, Y, _ = jps[i]
+        z_inv2 = z_inv * z_inv % P_FIELD
+        out[i] = (X * z_inv2 % P_FIELD, Y * z_inv2 * z_inv % P_FIELD)
+    return out
+
+
+def point_add_batch(pairs):
+    """[(a, b), ...] -> [a + b, ...] in affine, sharing one inversion."""
+    out = [INF] * len(pairs)
+    idx = []
+    dens = []
+    for i, (a, b) in enumerate(pairs):
+        if a is INF:
+            out[i] = b
+        elif b is INF:
+            out[i] = a
+        elif a[0] == b[0]:
+            if (a[1] + b[1]) % P_FIELD == 0:
+                continue  # a == -b
+            idx.append(i)
+            dens.append(2 * a[1] % P_FIELD)
+        else:
+            idx.append(i)
+            dens.append((b[0] - a[0]) % P_FIELD)
+
+    for i, d_inv in zip(idx, batch_inv(dens)):
+        (x1, y1), (x2, y2) = pairs[i]
+        if x1 == x2:
+            lam = 3 * x1 * x1 * d_inv % P_FIELD
+        else:
+            lam = (y2 - y1) * d_inv % P_FIELD
+        x3 = (lam * lam - x1 - x2) % P_FIELD
+        out[i] = (x3, (lam * (x1 - x3) - y1) % P_FIELD)
+    return out
+
+
+def point_sub_batch(pairs):
+    """[(a, b), ...] -> [a - b, ...] in affine, sharing one inversion."""
+    return point_add_batch([(a, point_neg(b)) for a, b in pairs])
+
+
+def scalar_mult_base_batch(ks):
+    """[k * G, ...] in affine with one inversion for the whole batch."""
+    return jacobian_to_affine_batch([scalar_mult_base_jacobian(k) for k in ks])
+
+
+def subtract_base_multiples_batch(point, ks):
+    """[point - k*G for k in ks] in affine with one shared inversion."""
+    return jacobian_to_affine_batch(
+        [jacobian_add_affine(jacobian_neg(scalar_mult_base_jacobian(k)), point) for k in ks])
+
+
 def decompress_pubkey(pub_hex: str):
     raw = bytes.fromhex(pub_hex)
     if len(raw) != 33 or raw[0] not in (2, 3):
@@ -114,10 +497,53 @@ def subtract_pubkeys(pubkey_a: str, pubkey_b: str) -> str:
     return compress_pubkey(point_add(a, point_neg(b)))
 
 
+# ---------- Point-level API ----------
+# Work on (x, y) tuples and 33-byte compressed keys; hex is only for I/O.
+
+def point_to_bytes(point) -> bytes:
+    if point is INF:
+        raise ValueError("Point at infinity has no compressed encoding")
+    x, y = point
+    return (b"\x03" if y & 1 else b"\x02") + x.to_bytes(32, "big")
+
+
+def point_from_bytes(raw: bytes):
+    return decompress_pubkey(raw.hex())
+
+
+def add_points(a, b):
+    return point_add(a, b)
+
+
+def subtract_points(a, b):
+    return point_add(a, point_neg(b))
+
+
+def compress_jacobian(jp) -> str:
+    return compress_pubkey(from_jacobian(jp))
+
+
 def pubkey_from_scalar(k: int) -> str:
     if not (0 <= k < N_ORDER):
         raise ValueError("Scalar must be in range 0 <= k < n")
-    return compress_pubkey(scalar_mult(k, G))
+    return compress_jacobian(scalar_mult_base_jacobian(k))
+
+
+def add_pubkeys_batch(pairs):
+    points = [(decompress_pubkey(a), decompress_pubkey(b)) for a, b in pairs]
+    return [compress_pubkey(p) for p in point_add_batch(points)]
+
+
+def subtract_pubkeys_batch(pairs):
+    points = [(decompress_pubkey(a), decompress_pubkey(b)) for a, b in pairs]
+    return [compress_pubkey(p) for p in point_sub_batch(points)]
+
+
+def pubkeys_from_scalars(ks):
+    for k in ks:
+        if not (0 <= k < N_ORDER):
+            raise ValueError("Scalar must be in range 0 <= k < n")
+    return [compress_pubkey(p) for p in scalar_mult_base_batch(ks)]
 
 
 if __name__ == "__main__":
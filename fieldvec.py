@@ -0,0 +1,342 @@
+"""
+NumPy-vectorized secp256k1 field and point arithmetic for bulk jobs.
+
+A batch of n field elements is a (10, n) uint64 array: ten 26-bit limbs
+per element (least significant first), one column per element. Limbs
+stay < 2^27, so a limb product is < 2^54 and ten of them summed stay
+< 2^58: schoolbook multiplication never overflows uint64. Reduction uses
+the secp256k1 shape p = 2^256 - 0x1000003D1, i.e. 2^260 == 0x1000003D10
+(mod p): limbs above 2^260 are folded back with a multiply by that constant, which is split as
+2^36 + 0x3D10 so every partial product still fits.
+
+Between operations elements are only loosely reduced (limbs < 2^27, carried
+in parallel rather than limb by limb) and are made canonical by
+from_limbs(). Inversion is batched with a product tree: pairwise products
+level by level, one pow(., -1, p) at the root, then two multiplications per
+level on the way down.
+
+Points are struct-of-arrays: Jacobian (X, Y, Z), each a (10, n) array.
+The vectorized formulas are those of example.py (dbl-2009-l and mixed
+addition). They assume generic inputs: no point at infinity and no
+P == +-Q. point_add_batch() checks for those cases and routes them through
+example.py. check() compares every operation bit-for-bit with example.py;
+`python fieldvec.py` runs it and times the vectorized path against
+example.point_add_batch.
+
+Measured here: a vectorized field multiplication is 1.4-1.9x faster than
+the same batch of Python int multiplications, but the point operations are
+still slower than example.point_add_batch (0.3-0.6x), whose affine adds
+with one shared inversion need fewer multiplications than the Jacobian
+formulas and pay no int <-> limb conversion.
+
+NumPy is optional (it is not in requirements.txt); without it, importing
+this module works but every function raises ImportError.
+"""
+
+import random
+import time
+import example
+from example import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LIMBS = 10
+LIMB_BITS = 26
+MASK = (1 << LIMB_BITS) - 1
+R_LO = 0x3D10                       # 2^260 mod p = 2^36 + R_LO
+R_HI_SHIFT = 36 - LIMB_BITS         # the 2^36 part, one limb up
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("fieldvec needs numpy (pip install numpy)")
+
+
+def _const_limbs(value: int, borrow: int = 0):
+    limbs = [(value >> (LIMB_BITS * i)) & MASK for i in range(LIMBS - 1)]
+    limbs.append(value >> (LIMB_BITS * (LIMBS - 1)))
+    # Move `borrow` units from every limb to the one below it (same value)
+    for i in range(LIMBS - 1):
+        limbs[i] += borrow << LIMB_BITS
+        limbs[i + 1] -= borrow
+    return limbs
+
+
+# 128p with every limb >= 2^28 - 4 > any input limb: a + SUB_BIAS - b never underflows
+_SUB_BIAS_LIMBS = _const_limbs(128 * P_FIELD, borrow=4)
+_sub_bias = None
+
+
+# ---------- Conversion ----------
+
+def to_limbs(values):
+    """Python ints (any size, reduced mod p first) -> (10, n) uint64 limb array."""
+    _require_numpy()
+    buf = b"".join((v % P_FIELD).to_bytes(40, "little") for v in values)
+    words = np.frombuffer(buf, dtype="<u8").reshape(len(values), 5).T
+    out = np.empty((LIMBS, len(values)), dtype=np.uint64)
+    for i in range(LIMBS):
+        w, s = divmod(LIMB_BITS * i, 64)
+        limb = words[w] >> np.uint64(s)
+        if s + LIMB_BITS > 64:
+            limb = limb | (words[w + 1] << np.uint64(64 - s))
+        out[i] = limb & np.uint64(MASK)
+    return out
+
+
+def from_limbs(a):
+    """(10, n) limb array -> list of canonical Python ints (< p)."""
+    _require_numpy()
+    a = _carry(np.vstack([a, np.zeros((1, a.shape[1]), dtype=np.uint64)]))   # value < 2^261
+    words = np.zeros((5, a.shape[1]), dtype=np.uint64)
+    for i in range(LIMBS + 1):
+        w, s = divmod(LIMB_BITS * i, 64)
+        words[w] |= a[i] << np.uint64(s)
+        if s + LIMB_BITS > 64 and w + 1 < 5:
+            words[w + 1] |= a[i] >> np.uint64(64 - s)
+    raw = words.T.astype("<u8").tobytes()
+    return [int.from_bytes(raw[40 * j:40 * j + 40], "little") % P_FIELD for j in range(a.shape[1])]
+
+
+# ---------- Reduction ----------
+# Field elements between operations are "loose": every limb < 2^27, value
+# < 2^261. Loose inputs keep all multiplication columns < 10 * 2^54 < 2^58.
+
+def _carry(t):
+    """Sequential carry: limbs 0..len-2 end up < 2^26 (in place). Used for output only."""
+    shift, mask = np.uint64(LIMB_BITS), np.uint64(MASK)
+    for i in range(t.shape[0] - 1):
+        t[i + 1] += t[i] >> shift
+        t[i] &= mask
+    return t
+
+
+def _pcarry(t, passes: int):
+    """Parallel carry on (10, n) limbs < 2^58; the carry out of the top limb
+    (weight 2^260) folds back as 2^36 + R_LO. Each pass shrinks limbs from
+    < 2^(26+k) to < 2^26 + 2^(k+14); two to three passes give loose limbs."""
+    shift, mask = np.uint64(LIMB_BITS), np.uint64(MASK)
+    for _ in range(passes):
+        c = t >> shift
+        t &= mask
+        t[1:] += c[:-1]
+        t[0] += c[-1] * np.uint64(R_LO)
+        t[1] += c[-1] << np.uint64(R_HI_SHIFT)
+    return t
+
+
+# ---------- Field operations (all vectorized over the last axis) ----------
+
+def add(a, b):
+    return _pcarry(a + b, 1)
+
+
+def sub(a, b):
+    global _sub_bias
+    if _sub_bias is None:
+        _sub_bias = np.array(_SUB_BIAS_LIMBS, dtype=np.uint64)[:, None]
+    return _pcarry(a + _sub_bias - b, 1)
+
+
+def mul_small(a, c: int):
+    """a * c for a small constant c (< 2^20)."""
+    return _pcarry(a * np.uint64(c), 3)
+
+
+def mul(a, b):
+    n = a.shape[1]
+    prod = a[:, None, :] * b[None, :, :]                      # (10, 10, n) partial products
+    cols = np.zeros((2 * LIMBS, n), dtype=np.uint64)
+    for i in range(LIMBS):
+        cols[i:i + LIMBS] += prod[i]
+    # Two parallel carry passes over all 20 columns (row 19 only absorbs carries)
+    shift, mask = np.uint64(LIMB_BITS), np.uint64(MASK)
+    for _ in range(2):
+        c = cols >> shift
+        cols[:-1] &= mask
+        cols[1:] += c[:-1]
+    # value = lo + hi * 2^260 == lo + hi * (2^36 + R_LO)
+    lo, hi = cols[:LIMBS], cols[LIMBS:]
+    t = lo + hi * np.uint64(R_LO)
+    t[1:] += hi[:-1] << np.uint64(R_HI_SHIFT)
+    top = hi[-1] << np.uint64(R_HI_SHIFT)                     # weight 2^260 again
+    t[0] += top * np.uint64(R_LO)
+    t[1] += top << np.uint64(R_HI_SHIFT)
+    return _pcarry(t, 3)
+
+
+def sqr(a):
+    return mul(a, a)
+
+
+def inv_batch(a):
+    """Invert every element (all must be non-zero mod p): product tree + one pow()."""
+    n = a.shape[1]
+    size = 1
+    while size < n:
+        size *= 2
+    level = np.zeros((LIMBS, size), dtype=np.uint64)
+    level[:, :n] = a
+    level[0, n:] = 1
+    levels = [level]
+    while level.shape[1] > 1:
+        level = mul(level[:, 0::2], level[:, 1::2])
+        levels.append(level)
+    inv = to_limbs([pow(from_limbs(level)[0], -1, P_FIELD)])
+    for below in reversed(levels[:-1]):
+        out = np.empty_like(below)
+        out[:, 0::2] = mul(inv, below[:, 1::2])
+        out[:, 1::2] = mul(inv, below[:, 0::2])
+        inv = out
+    return inv[:, :n]
+
+
+# ---------- Points, struct-of-arrays ----------
+
+def jacobian_double_vec(X1, Y1, Z1):
+    """dbl-2009-l (a = 0) on whole arrays; no point may be infinity."""
+    A = sqr(X1)
+    B = sqr(Y1)
+    C = sqr(B)
+    XB = add(X1, B)
+    D = mul_small(sub(sub(sqr(XB), A), C), 2)
+    E = mul_small(A, 3)
+    F = sqr(E)
+    X3 = sub(F, mul_small(D, 2))
+    Y3 = sub(mul(E, sub(D, X3)), mul_small(C, 8))
+    Z3 = mul_small(mul(Y1, Z1), 2)
+    return X3, Y3, Z3
+
+
+def jacobian_add_affine_vec(X1, Y1, Z1, x2, y2):
+    """Mixed addition (X1, Y1, Z1) + (x2, y2); assumes no infinity and P != +-Q."""
+    Z1Z1 = sqr(Z1)
+    U2 = mul(x2, Z1Z1)
+    S2 = mul(y2, mul(Z1, Z1Z1))
+    H = sub(U2, X1)
+    R = sub(S2, Y1)
+    HH = sqr(H)
+    HHH = mul(H, HH)
+    V = mul(X1, HH)
+    X3 = sub(sub(sqr(R), HHH), mul_small(V, 2))
+    Y3 = sub(mul(R, sub(V, X3)), mul(Y1, HHH))
+    Z3 = mul(Z1, H)
+    return X3, Y3, Z3
+
+
+def to_affine_vec(X, Y, Z):
+    """Jacobian arrays -> affine (x, y) arrays with one batched inversion."""
+    z_inv = inv_batch(Z)
+    z_inv2 = sqr(z_inv)
+    return mul(X, z_inv2), mul(Y, mul(z_inv2, z_inv))
+
+
+def affine_add_vec(x1, y1, x2, y2):
+    """P + Q for arrays of affine points with x1 != x2 everywhere."""
+    lam = mul(sub(y2, y1), inv_batch(sub(x2, x1)))
+    x3 = sub(sub(sqr(lam), x1), x2)
+    y3 = sub(mul(lam, sub(x1, x3)), y1)
+    return x3, y3
+
+
+def point_add_batch(pairs):
+    """Drop-in for example.point_add_batch; generic pairs run vectorized."""
+    _require_numpy()
+    out = [INF] * len(pairs)
+    generic = [i for i, (a, b) in enumerate(pairs) if a is not INF and b is not INF and a[0] != b[0]]
+    special = sorted(set(range(len(pairs))) - set(generic))
+    for i, point in zip(special, example.point_add_batch([pairs[i] for i in special])):
+        out[i] = point
+    if generic:
+        cols = list(zip(*[(pairs[i][0][0], pairs[i][0][1], pairs[i][1][0], pairs[i][1][1])
+                          for i in generic]))
+        x3, y3 = affine_add_vec(*(to_limbs(c) for c in cols))
+        for i, x, y in zip(generic, from_limbs(x3), from_limbs(y3)):
+            out[i] = (x, y)
+    return out
+
+
+def multiples_batch(starts, step, count: int):
+    """[[s + j*step for j in range(count)] for s in starts] in affine.
+
+    Every lane walks with one vectorized mixed addition per j; all points are
+    converted to affine with a single product-tree inversion at the end.
+    Generic inputs only: no lane may reach infinity or land on +-step.
+    """
+    _require_numpy()
+    n = len(starts)
+    X = to_limbs([s[0] for s in starts])
+    Y = to_limbs([s[1] for s in starts])
+    Z = to_limbs([1] * n)
+    sx = np.repeat(to_limbs([step[0]]), n, axis=1)
+    sy = np.repeat(to_limbs([step[1]]), n, axis=1)
+    Xs, Ys, Zs = [X], [Y], [Z]
+    for _ in range(count - 1):
+        X, Y, Z = jacobian_add_affine_vec(X, Y, Z, sx, sy)
+        Xs.append(X)
+        Ys.append(Y)
+        Zs.append(Z)
+    x, y = to_affine_vec(np.hstack(Xs), np.hstack(Ys), np.hstack(Zs))
+    xs, ys = from_limbs(x), from_limbs(y)
+    return [[(xs[j * n + i], ys[j * n + i]) for j in range(count)] for i in range(n)]
+
+
+def check(n: int = 200, seed: int = 1):
+    """Compare every vectorized operation with example.py on random inputs."""
+    _require_numpy()
+    rng = random.Random(seed)
+    edge = [0, 1, 2, P_FIELD - 1, P_FIELD - 2, 2**256 - 2**32 - 978, MASK, 1 << 255]
+    a_int = edge + [rng.randrange(P_FIELD) for _ in range(n)]
+    b_int = list(reversed(edge)) + [rng.randrange(P_FIELD) for _ in range(n)]
+    a, b = to_limbs(a_int), to_limbs(b_int)
+
+    assert from_limbs(a) == a_int
+    assert from_limbs(add(a, b)) == [(x + y) % P_FIELD for x, y in zip(a_int, b_int)]
+    assert from_limbs(sub(a, b)) == [(x - y) % P_FIELD for x, y in zip(a_int, b_int)]
+    assert from_limbs(mul(a, b)) == [x * y % P_FIELD for x, y in zip(a_int, b_int)]
+    assert from_limbs(mul_small(a, 8)) == [8 * x % P_FIELD for x in a_int]
+    # Chained ops on weakly reduced values
+    c = mul(add(mul(a, b), sub(a, b)), sqr(b))
+    assert from_limbs(c) == [((x * y + x - y) * y * y) % P_FIELD for x, y in zip(a_int, b_int)]
+    nonzero = [x for x in a_int if x % P_FIELD]
+    assert from_limbs(inv_batch(to_limbs(nonzero))) == batch_inv(nonzero)
+
+    points = scalar_mult_base_batch([rng.randrange(1, N_ORDER) for _ in range(n)])
+    jps = [jacobian_double(to_jacobian(p)) for p in points]
+    X, Y, Z = (to_limbs(col) for col in zip(*jps))
+    dbl = jacobian_double_vec(X, Y, Z)
+    assert list(zip(*map(from_limbs, dbl))) == [jacobian_double(jp) for jp in jps]
+    others = list(reversed(points))
+    x2, y2 = (to_limbs(col) for col in zip(*others))
+    added = jacobian_add_affine_vec(X, Y, Z, x2, y2)
+    assert list(zip(*map(from_limbs, added))) == [jacobian_add_affine(jp, q) for jp, q in zip(jps, others)]
+    assert list(zip(*map(from_limbs, to_affine_vec(*added)))) == \
+        jacobian_to_affine_batch([jacobian_add_affine(jp, q) for jp, q in zip(jps, others)])
+
+    pairs = list(zip(points, others)) + [(points[0], points[0]), (points[1], point_neg(points[1])),
+                                         (INF, points[2]), (points[3], INF)]
+    assert point_add_batch(pairs) == example.point_add_batch(pairs)
+    walk = multiples_batch(points[:5], G, 20)
+    for start, row in zip(points[:5], walk):
+        assert row == [add_points(start, scalar_mult_base(j)) if j else start for j in range(20)]
+    return True
+
+
+if __name__ == "__main__":
+    check()
+    print("fieldvec matches example.py bit-for-bit")
+    rng = random.Random(2)
+    for n in (256, 4096):
+        ps = scalar_mult_base_batch([rng.randrange(1, N_ORDER) for _ in range(2 * n)])
+        pairs = list(zip(ps[:n], ps[n:]))
+        t = time.perf_counter()
+        example.point_add_batch(pairs)
+        t_ref = time.perf_counter() - t
+        t = time.perf_counter()
+        point_add_batch(pairs)
+        t_vec = time.perf_counter() - t
+        print(f"point_add_batch, {n} pairs: example.py {t_ref * 1e3:.1f} ms, "
+              f"numpy {t_vec * 1e3:.1f} ms ({t_ref / t_vec:.2f}x)")
@@ -1,6 +1,9 @@
 import os
+import argparse
 from example import *
 import random
+import genpipe
+from bintable import convert_text_table
 
 HIGH = 4355614296588012332331194975126633106636
 LOW = 2177807148294006166165597487563316553318
@@ -8,36 +11,46 @@ LOW = 2177807148294006166165597487563316553318
 # ---------- Your existing EC functions (assumed defined) ----------
 # P_FIELD, N_ORDER, G, scalar_mult, pubkey_from_scalar, etc.
 
-def generate_precomputed_hex(filename="precomputed_hex.txt", max_exponent=135):
+def random_chunk(params, i):
+    """Chunk i of a generate_precomputed_hex run: block_size random scalars and their pubkeys.
+    The scalars come from a generator seeded with (seed, i), so a resumed run
+    regenerates exactly the chunks that were lost.
     """
-    Generate a file with precomputed points 16^i * G for i = 0..max_exponent.
-    Each line: i <compressed_pubkey>
+    start = i * params["block_size"]
+    count = min(params["block_size"], params["count"] - start)
+    rng = random.Random(f"{params['seed']}:{i}")
+    scalars = [rng.randint(params["low"], params["high"]) for _ in range(count)]
+    # One shared inversion for the whole block
+    pubs = pubkeys_from_scalars(scalars)
+    return "".join(f"{scalar} {pub_hex}\n" for scalar, pub_hex in zip(scalars, pubs))
+
+def generate_precomputed_hex(filename="precomputed_hex.txt", max_exponent=135, block_size=1024,
+                             workers=None, overwrite=None, resume=False):
+    """
+    Generate a file with max_exponent + 1 random scalars r in [LOW, HIGH] and r*G.
+    Each line: r <compressed_pubkey>
+    Chunks of block_size lines are computed in parallel by a process pool
+    (workers, default all cores) and checkpointed; resume=True continues an
+    interrupted run. overwrite=None asks before replacing an existing file.
     """
-    # Check if file already exists
-    if os.path.exists(filename):
-        print(f"File {filename} already exists. Overwrite? (y/n)")
-        ans = input().strip().lower()
-        if ans != 'y':
-            print("Aborting.")
-            return
+    params = {"count": max_exponent + 1, "block_size": block_size, "low": LOW, "high": HIGH}
+    previous = genpipe.resume_params(filename) if resume else None
+    params["seed"] = previous["seed"] if previous else os.urandom(16).hex()
 
-    with open(filename, 'w') as f:
-        for i in range(max_exponent + 1):
-            # scalar = 2 ** i
-            scalar = random.randint(LOW, HIGH)  
-            # print(hex(scalar))
-            # Optional: ensure scalar < N_ORDER (curve order)
-            # if scalar >= N_ORDER:
-            #     print(f"Stopping at i={i-1} because 16^{i} >= N_ORDER")
-            #     break
-            pub_hex = pubkey_from_scalar(scalar)
-            # print(pub_hex)
-            f.write(f"{scalar} {pub_hex}\n")
-            # await() 
-            # if i % 5 == 0:
-            #     print(f"Generated i = {i} (16^{i} * G)")
-    print(f"Done. Points saved to {filename}")
+    num_chunks = (params["count"] + block_size - 1) // block_size
+    if genpipe.run_chunks(filename, random_chunk, params, num_chunks,
+                          workers=workers, overwrite=overwrite, resume=resume):
+        print(f"Done. Points saved to {filename}")
+        return True
+    return False
 
 # Example: generate up to 16^40 (i=40)
 if __name__ == "__main__":
-    generate_precomputed_hex("precomputed_hex.txt", max_exponent=9000000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate random r -> r*G lookup tables")
+    parser.add_argument("--count", type=int, default=9000001)
+    genpipe.add_arguments(parser)
+    args = parser.parse_args()
+
+    if generate_precomputed_hex(args.output, max_exponent=args.count - 1, workers=args.workers,
+                                overwrite=args.overwrite, resume=args.resume) and args.binary:
+        convert_text_table(args.output, args.binary)
@@ -1,45 +1,119 @@
-import os
-from example import pubkey_from_scalar  # Assumes this function returns a compressed pubkey hex string
+import argparse
+from example import *
+import genpipe
+from bintable import convert_text_table
 
-def generate_power_of_16_multiples(filename="precomputed_hex.txt", max_hex="0x1000000000000000000000000000000000"):
+# Powers k per pipeline chunk; a whole table is usually a single chunk.
+KS_PER_CHUNK = 64
+
+def _mul_small(jp, n):
+    """n * jp for n >= 1, Jacobian in and out (pure doublings when n is a power of 2)."""
+    result = JAC_INF
+    for bit in bin(n)[2:]:
+        result = jacobian_double(result)
+        if bit == "1":
+            result = jacobian_add(result, jp)
+    return result
+
+def radix_multiples(radix=16, digits=range(1, 16), max_k=33, min_k=1, batched=True):
+    """
+    Return [(d * radix^k, point)] for k = min_k..max_k and every d in digits, in that order.
+    Built from addition chains instead of one scalar multiplication per entry:
+    radix^(k+1)*G = radix * (radix^k*G) (only doublings for radix 16), and
+    consecutive digits differ by one addition of radix^k*G.
+    batched=True converts all points to affine with Montgomery's shared inversion.
     """
-    Generate public keys for exponents of the form d * 16^k,
-    where d = 1..15 and k = 1..max_k, with 16^k <= max_hex.
+    digits = sorted(set(digits))
+    if radix < 2 or not digits or digits[0] < 1:
+        raise ValueError("radix must be >= 2 and digits must be positive integers")
+
+    # radix^k * G for every k, Jacobian, then affine for the mixed additions below
+    bases = [_mul_small(to_jacobian(G), radix ** min_k)]
+    for _ in range(min_k, max_k):
+        bases.append(_mul_small(bases[-1], radix))
+    if batched:
+        bases = jacobian_to_affine_batch(bases)
+    else:
+        bases = [from_jacobian(jp) for jp in bases]
+
+    exps = []
+    points = []
+    for k, base in zip(range(min_k, max_k + 1), bases):
+        power = radix ** k
+        current = scalar_mult_jacobian(digits[0], base)
+        prev = digits[0]
+        for d in digits:
+            delta = d - prev
+            if delta == 1:
+                current = jacobian_add_affine(current, base)
+            elif delta > 1:
+                current = jacobian_add(current, scalar_mult_jacobian(delta, base))
+            prev = d
+            exps.append(d * power)
+            points.append(current)
+
+    if batched:
+        points = jacobian_to_affine_batch(points)
+    else:
+        points = [from_jacobian(jp) for jp in points]
+    return list(zip(exps, points))
+
+def radix_chunk(params, i):
+    """Chunk i: all digits for k in the i-th group of KS_PER_CHUNK powers."""
+    min_k = 1 + i * KS_PER_CHUNK
+    max_k = min(params["max_k"], min_k + KS_PER_CHUNK - 1)
+    entries = radix_multiples(params["radix"], params["digits"], max_k, min_k)
+    return "".join(f"{exp} {compress_pubkey(point)}\n" for exp, point in entries)
+
+def generate_power_of_16_multiples(filename="precomputed_hex.txt", max_hex="0x1000000000000000000000000000000000",
+                                   workers=None, overwrite=None, resume=False, radix=16, digits=None):
+    """
+    Generate public keys for exponents of the form d * radix^k,
+    where d = 1..radix-1 (or the given digits) and k = 1..max_k, with radix^k <= max_hex.
     Saves each line as "exponent pubkey_hex".
+    Built with radix_multiples and written through genpipe (parallel, checkpointed).
     """
+    if radix < 2:
+        raise ValueError(f"radix must be >= 2, got {radix}")
+    digits = sorted(set(digits)) if digits else list(range(1, radix))
+    if digits[0] < 1 or digits[-1] >= radix:
+        raise ValueError(f"digits must be in 1..{radix - 1}")
     # Convert the maximum hex value to an integer
     max_val = int(max_hex, 16)
 
-    # Determine the largest k such that 16**k <= max_val
+    # Determine the largest k such that radix**k <= max_val
     k = 1
     while True:
-        power = 16 ** k
+        power = radix ** k
         if power > max_val:
             break
         k += 1
     max_k = k - 1
-    print(f"Maximum k: {max_k} (16^{max_k} = {hex(16**max_k)})")
-
-    # Check if the output file already exists
-    if os.path.exists(filename):
-        print(f"File {filename} already exists. Overwrite? (y/n)")
-        ans = input().strip().lower()
-        if ans != 'y':
-            print("Aborting.")
-            return
-
-    total = 0
-    with open(filename, 'w') as f:
-        for k in range(1, max_k + 1):
-            base = 16 ** k
-            for d in range(1, 16):          # hex digits 1..F
-                exp = d * base
-                pub = pubkey_from_scalar(exp)
-                f.write(f"{exp} {pub}\n")
-                total += 1
-                if total % 100 == 0:
-                    print(f"Generated {total} entries...")
-        print(f"Done. Generated {total} points saved to {filename}")
+    print(f"Maximum k: {max_k} ({radix}^{max_k} = {hex(radix**max_k)})")
+
+    params = {"max_k": max_k, "radix": radix, "digits": digits}
+    num_chunks = (max_k + KS_PER_CHUNK - 1) // KS_PER_CHUNK
+    if not genpipe.run_chunks(filename, radix_chunk, params, num_chunks,
+                              workers=workers, overwrite=overwrite, resume=resume):
+        return False
+    print(f"Done. Generated {len(digits) * max_k} points saved to {filename}")
+    return True
 
 if __name__ == "__main__":
-    generate_power_of_16_multiples()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate d * radix^k lookup tables")
+    parser.add_argument("--max-hex", default="0x1000000000000000000000000000000000")
+    parser.add_argument("--radix", type=int, default=16)
+    parser.add_argument("--digits", default=None,
+                        help="comma-separated digit set (default: 1..radix-1)")
+    genpipe.add_arguments(parser)
+    args = parser.parse_args()
+
+    digits = [int(d) for d in args.digits.split(",")] if args.digits else None
+    try:
+        done = generate_power_of_16_multiples(args.output, args.max_hex, workers=args.workers,
+                                              overwrite=args.overwrite, resume=args.resume,
+                                              radix=args.radix, digits=digits)
+    except ValueError as e:
+        parser.error(str(e))
+    if done and args.binary:
+        convert_text_table(args.output, args.binary)
@@ -0,0 +1,108 @@
+"""
+Parallel, resumable, buffered table generation for gen_pubs.py and gen_pubs2.py.
+
+A job is split into numbered chunks. chunk_fn(params, i) must be a module-level
+function that returns the text of chunk i, and its result must depend only
+on (params, i). A process pool computes chunks in parallel. The parent
+appends each finished chunk to the output in order, with one bulk write,
+and then records in <filename>.ckpt how many chunks and bytes are complete.
+An interrupted run started again with resume=True truncates the file to the
+last checkpoint and continues from the next chunk.
+"""
+
+import json
+import os
+import time
+import multiprocessing as mp
+from functools import partial
+from example import prepare_fixed_base
+
+
+def checkpoint_path(filename: str) -> str:
+    return filename + ".ckpt"
+
+
+def resume_params(filename: str):
+    """Params of an interrupted run that wrote filename, or None."""
+    try:
+        with open(checkpoint_path(filename)) as f:
+            return json.load(f)["params"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save_checkpoint(filename: str, params, chunks_done: int, offset: int):
+    tmp = checkpoint_path(filename) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"params": params, "chunks_done": chunks_done, "offset": offset}, f)
+    os.replace(tmp, checkpoint_path(filename))
+
+
+def confirm_overwrite(filename: str, overwrite=None) -> bool:
+    """overwrite=None asks on stdin (the old behaviour); True/False decide without asking."""
+    if not os.path.exists(filename):
+        return True
+    if overwrite is None:
+        print(f"File {filename} already exists. Overwrite? (y/n)")
+        overwrite = input().strip().lower() == 'y'
+    if not overwrite:
+        print("Aborting.")
+    return overwrite
+
+
+def run_chunks(filename: str, chunk_fn, params, num_chunks: int, workers=None,
+               overwrite=None, resume=False):
+    """
+    Generate num_chunks chunks of chunk_fn(params, i) into filename.
+    Returns True when the file is complete, False if the run was aborted.
+    """
+    start = 0
+    offset = 0
+    ckpt = checkpoint_path(filename)
+    if resume and os.path.exists(ckpt) and os.path.exists(filename):
+        with open(ckpt) as f:
+            state = json.load(f)
+        if state["params"] != params:
+            raise ValueError(f"{ckpt} was written for different parameters; "
+                             "remove it or run without resume")
+        start, offset = state["chunks_done"], state["offset"]
+        print(f"Resuming {filename} at chunk {start}/{num_chunks}")
+    elif not confirm_overwrite(filename, overwrite):
+        return False
+
+    prepare_fixed_base()
+
+    start_time = time.time()
+    with open(filename, "r+b" if start else "wb") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        _save_checkpoint(filename, params, start, offset)
+
+        with mp.Pool(workers) as pool:
+            chunks = pool.imap(partial(chunk_fn, params), range(start, num_chunks))
+            for i, text in enumerate(chunks, start + 1):
+                f.write(text.encode())
+                f.flush()
+                os.fsync(f.fileno())
+                _save_checkpoint(filename, params, i, f.tell())
+                if i % 100 == 0 or i == num_chunks:
+                    rate = (i - start) / (time.time() - start_time)
+                    print(f"Chunk {i}/{num_chunks} ({rate:.1f} chunks/s)")
+
+    os.remove(ckpt)
+    return True
+
+
+def add_arguments(parser):
+    """Command-line flags shared by the table generators."""
+    parser.add_argument("--output", "-o", default="precomputed_hex.txt")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="pool size (default: all cores)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from its checkpoint")
+    parser.add_argument("--yes", dest="overwrite", action="store_const", const=True, default=None,
+                        help="overwrite an existing file without asking")
+    parser.add_argument("--no-clobber", dest="overwrite", action="store_const", const=False,
+                        help="never overwrite an existing file (batch jobs)")
+    parser.add_argument("--binary", metavar="FILE", default=None,
+                        help="also convert the finished table to the binary format")
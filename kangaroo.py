@@ -0,0 +1,199 @@
+"""
+Parallel Pollard kangaroo (lambda) search for k with k*G == target, LOW <= k <= HIGH.
+
+Each worker process runs a tame herd (points a*G, a known) and a wild herd
+(points Q + b*G, b known). All kangaroos jump forward by s_i*G, where i is
+picked from the current x, so two kangaroos that land on the same point follow
+the same path from then on. Points whose x has dp_bits low zero bits are
+"distinguished" and are sent to the parent, which keeps the shared store.
+A tame and a wild kangaroo meeting at one distinguished point give
+a*G == Q + b*G, i.e. k = a - b.
+
+Expected work is about 2*sqrt(HIGH - LOW) jumps and memory is only the
+distinguished-point store, instead of a table that has to cover the interval.
+"""
+
+import math
+import os
+import random
+import time
+import multiprocessing as mp
+import queue
+from example import *
+
+TAME = 0
+WILD = 1
+
+
+def jump_distances(width: int, num_kangaroos: int):
+    """Powers of two whose mean is about num_kangaroos * sqrt(width) / 4."""
+    target = max(1, num_kangaroos * math.isqrt(width) // 4)
+    count = 1
+    while ((1 << count) - 1) // count < target:
+        count += 1
+    return [1 << i for i in range(count)]
+
+
+def default_dp_bits(width: int, num_kangaroos: int) -> int:
+    """Aim for ~sqrt(width) / num_kangaroos / 4 jumps between distinguished points."""
+    return max(0, (math.isqrt(width) // (4 * num_kangaroos)).bit_length() - 1)
+
+
+def _start(kind, rng, low, high):
+    """Fresh starting scalar: tame a in the upper half, wild offset b in [0, W/4)."""
+    width = high - low
+    if kind == TAME:
+        return low + width // 2 + rng.randrange(max(1, width // 4))
+    return rng.randrange(max(1, width // 4))
+
+
+def kangaroo_worker(target_pub_hex, low, high, jumps, dp_bits, herd_size,
+                    stop_event, dp_queue, control_queue, worker_id):
+    """
+    Worker process: moves herd_size tame and herd_size wild kangaroos, all in
+    one batched addition per round, and reports distinguished points to
+    dp_queue as (kind, x, dist, worker_id, index). The parent restarts
+    kangaroos that merged with one of their own kind via control_queue.
+    """
+    rng = random.Random()
+    rng.seed(os.urandom(8) + worker_id.to_bytes(4, 'big'))
+
+    target_point = decompress_pubkey(target_pub_hex)
+    jump_points = scalar_mult_base_batch(jumps)
+    num_jumps = len(jumps)
+    dp_mask = (1 << dp_bits) - 1
+
+    kinds = [TAME] * herd_size + [WILD] * herd_size
+    dists = [_start(kind, rng, low, high) for kind in kinds]
+
+    def place(indices):
+        # tame: a*G, wild: Q + b*G
+        bases = [INF if kinds[i] == TAME else target_point for i in indices]
+        starts = scalar_mult_base_batch([dists[i] for i in indices])
+        return point_add_batch(list(zip(bases, starts)))
+
+    points = place(range(len(kinds)))
+    rounds = 0
+
+    while True:
+        if rounds % 64 == 0:
+            if stop_event.is_set():
+                break
+            restart = []
+            try:
+                while True:
+                    restart.append(control_queue.get_nowait())
+            except queue.Empty:
+                pass
+            if restart:
+                for i in restart:
+                    dists[i] = _start(kinds[i], rng, low, high)
+                for i, point in zip(restart, place(restart)):
+                    points[i] = point
+        rounds += 1
+
+        picks = [point[0] % num_jumps for point in points]
+        points = point_add_batch([(point, jump_points[j]) for point, j in zip(points, picks)])
+
+        found = []
+        for i, j in enumerate(picks):
+            dists[i] += jumps[j]
+            x = points[i][0] if points[i] is not INF else 0
+            if x & dp_mask == 0:
+                found.append((kinds[i], x, dists[i], worker_id, i))
+        if found:
+            dp_queue.put(found)
+
+
+def parallel_kangaroo(target_pub_hex, low, high, num_workers=4, herd_size=32,
+                      dp_bits=None, report_every=10.0):
+    """
+    Parallel kangaroo over [low, high].
+    Returns (k, a, b) with a*G == Q + b*G if found (same shape as
+    parallel_find_match's (k, r, exp)), else None on interrupt.
+    """
+    width = high - low
+    num_kangaroos = 2 * herd_size * num_workers
+    jumps = jump_distances(width, num_kangaroos)
+    if dp_bits is None:
+        dp_bits = default_dp_bits(width, num_kangaroos)
+    print(f"Kangaroos: {num_kangaroos}, jump sizes: 2^0..2^{len(jumps) - 1}, DP bits: {dp_bits}, "
+          f"expected ~2^{(2 * math.isqrt(width)).bit_length()} jumps")
+
+    prepare_fixed_base()
+
+    target_point = decompress_pubkey(target_pub_hex)
+    stop_event = mp.Event()
+    dp_queue = mp.Queue()
+    control_queues = [mp.Queue() for _ in range(num_workers)]
+
+    processes = []
+    for i in range(num_workers):
+        p = mp.Process(target=kangaroo_worker,
+                       args=(target_pub_hex, low, high, jumps, dp_bits, herd_size,
+                             stop_event, dp_queue, control_queues[i], i))
+        p.start()
+        processes.append(p)
+
+    store = {}          # x -> (kind, dist)
+    start_time = time.time()
+    last_report = start_time
+    try:
+        while True:
+            try:
+                batch = dp_queue.get(timeout=0.1)
+            except queue.Empty:
+                batch = []
+
+            for kind, x, dist, worker_id, index in batch:
+                seen = store.get(x)
+                if seen is None:
+                    store[x] = (kind, dist)
+                    continue
+                seen_kind, seen_dist = seen
+                if seen_kind == kind:
+                    # Same-kind merge: the newcomer would only retrace the path
+                    control_queues[worker_id].put(index)
+                    continue
+                a, b = (dist, seen_dist) if kind == TAME else (seen_dist, dist)
+                k = (a - b) % N_ORDER
+                if scalar_mult_base(k) == target_point:
+                    stop_event.set()
+                    print(f"Collision after {time.time() - start_time:.2f}s, {len(store)} DPs stored")
+                    return (k, a, b)
+
+            now = time.time()
+            if now - last_report >= report_every:
+                last_report = now
+                print(f"{len(store)} distinguished points after {now - start_time:.0f}s")
+
+            if not any(p.is_alive() for p in processes):
+                return None
+
+    except KeyboardInterrupt:
+        print("Interrupted, stopping workers...")
+        stop_event.set()
+        return None
+    finally:
+        stop_event.set()
+        for p in processes:
+            p.join(timeout=1)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+
+
+if __name__ == "__main__":
+    target = "02145d2611c823a396ef6712ce0f712f09b9b4f3135e3e0aa3230fb9b6d08d1e16"
+    HIGH = 43556142965880123323311949751266331066368
+    LOW = 21778071482940061661655974875633165533184
+
+    num_cores = mp.cpu_count()
+    print(f"Starting kangaroo search with {num_cores} workers...")
+    result = parallel_kangaroo(target, LOW, HIGH, num_workers=num_cores)
+
+    if result:
+        k, a, b = result
+        print(f"\nSUCCESS: k = {k} (tame = {a}, wild = {b})")
+    else:
+        print("\nNo match found.")
@@ -0,0 +1,98 @@
+"""
+Live throughput counters for the search workers.
+
+Each worker owns one row of a shared, lock-free array (it is the only writer
+of that row) and adds its per-block totals to it. The parent reads all rows
+every report interval and prints keys/sec overall and per worker. It can also
+append the numbers to a JSON-lines file and/or rewrite a Prometheus text
+file for node_exporter's textfile collector.
+"""
+
+import json
+import os
+import time
+import multiprocessing as mp
+
+FIELDS = ("attempts", "lookups", "hits", "ec_seconds", "lookup_seconds")
+ATTEMPTS, LOOKUPS, HITS, EC_SECONDS, LOOKUP_SECONDS = range(len(FIELDS))
+
+
+def create_counters(num_workers: int):
+    """Shared per-worker counters: num_workers rows of len(FIELDS) doubles."""
+    return mp.Array('d', num_workers * len(FIELDS), lock=False)
+
+
+def add_block(counters, worker_id, attempts, lookups, hits, ec_seconds, lookup_seconds):
+    """Worker side: add one block's totals to this worker's row."""
+    base = worker_id * len(FIELDS)
+    counters[base + ATTEMPTS] += attempts
+    counters[base + LOOKUPS] += lookups
+    counters[base + HITS] += hits
+    counters[base + EC_SECONDS] += ec_seconds
+    counters[base + LOOKUP_SECONDS] += lookup_seconds
+
+
+def read_rows(counters):
+    width = len(FIELDS)
+    values = counters[:]
+    return [values[i:i + width] for i in range(0, len(values), width)]
+
+
+class MetricsReporter:
+    """Parent side: turns counter snapshots into periodic rate reports."""
+
+    def __init__(self, counters, interval=30.0, jsonl_file=None, prometheus_file=None, status=None):
+        self.counters = counters
+        self.status = status        # optional callable: extra text for each report line
+        self.interval = interval
+        self.jsonl_file = jsonl_file
+        self.prometheus_file = prometheus_file
+        self.start_time = time.time()
+        self.last_time = self.start_time
+        self.last_rows = read_rows(counters)
+
+    def maybe_report(self):
+        if time.time() - self.last_time >= self.interval:
+            self.report()
+
+    def report(self):
+        now = time.time()
+        rows = read_rows(self.counters)
+        dt = max(now - self.last_time, 1e-9)
+        rates = [(row[ATTEMPTS] - last[ATTEMPTS]) / dt for row, last in zip(rows, self.last_rows)]
+        totals = [sum(col) for col in zip(*rows)]
+        busy = totals[EC_SECONDS] + totals[LOOKUP_SECONDS]
+        ec_share = totals[EC_SECONDS] / busy if busy else 0.0
+
+        print(f"[{now - self.start_time:.0f}s] {sum(rates):,.0f} keys/s, "
+              f"{totals[ATTEMPTS]:,.0f} attempts, {totals[HITS]:.0f} hits, "
+              f"EC {ec_share:.0%} / lookup {1 - ec_share:.0%} | per worker: "
+              + " ".join(f"{rate:,.0f}" for rate in rates)
+              + (f" | {self.status()}" if self.status else ""))
+
+        record = {"time": now, "elapsed": now - self.start_time, "keys_per_sec": sum(rates),
+                  "workers": [dict(zip(FIELDS, row), keys_per_sec=rate) for row, rate in zip(rows, rates)]}
+        record.update(zip(FIELDS, totals))
+        if self.jsonl_file:
+            with open(self.jsonl_file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        if self.prometheus_file:
+            self._write_prometheus(rows, rates)
+
+        self.last_time = now
+        self.last_rows = rows
+
+    def _write_prometheus(self, rows, rates):
+        lines = []
+        for name in FIELDS:
+            metric = f"mojo_search_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for worker_id, row in enumerate(rows):
+                lines.append(f'{metric}{{worker="{worker_id}"}} {row[FIELDS.index(name)]}')
+        lines.append("# TYPE mojo_search_keys_per_second gauge")
+        for worker_id, rate in enumerate(rates):
+            lines.append(f'mojo_search_keys_per_second{{worker="{worker_id}"}} {rate}')
+        tmp = self.prometheus_file + ".tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prometheus_file)
@@ -1,132 +1,27 @@
-import os
-import random
-import time
-import multiprocessing as mp
+import argparse
 from example import *
 
-import asyncio
-from telegram import Bot
+from notify import Notifier, make_backend
 
 BOT_TOKEN = ''
 CHAT_ID = 5  # Your chat ID (integer)
 
-async def send_message(bot_token, chat_id, message):
-    bot = Bot(token=bot_token)
-    await bot.send_message(chat_id=chat_id, text=message)
-    print("Message sent successfully!")
+# Table loading, the batched worker and the process pool are shared with midd3.py
+from midd3 import (load_precomputed, load_table, worker, parallel_find_match,
+                   add_search_arguments, apply_search_arguments)
 
-asyncio.run(send_message(BOT_TOKEN, CHAT_ID, message="Starting the search for k..."))
-
-
-def load_precomputed(filename):
-    """Load precomputed points from file.
-       Returns a dict: compressed_pubkey -> exponent (int)
-    """
-    table = {}
-    with open(filename, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split()
-            if len(parts) != 2:
-                continue
-            exp_str, pub_hex = parts
-            table[pub_hex] = int(exp_str)
-    return table
-
-def worker(target_pub_hex, low, high, precomputed_table, stop_event, result_queue, worker_id, max_attempts=None):
-    """
-    Worker process: repeatedly picks random r, computes Q - r*G, checks if in table.
-    If found, puts (k, r, exp) into result_queue and sets stop_event.
-    """
-    # Use a local random generator seeded uniquely
-    rng = random.Random()
-    rng.seed(os.urandom(8) + worker_id.to_bytes(4, 'big'))
-
-    attempts = 0
-    start_time = time.time()
-    local_stop = False
-
-    while not local_stop and (max_attempts is None or attempts < max_attempts):
-        # Check global stop event occasionally
-        if attempts % 1000 == 0 and stop_event.is_set():
-            break
-
-        attempts += 1
-        r = rng.randint(low, high)
-        # print(r)
-        R_pub = pubkey_from_scalar(r)                # compute r*G
-        diff_pub = subtract_pubkeys(target_pub_hex, R_pub)   # Q - r*G
-
-        if diff_pub in precomputed_table:
-            axlosaa = (f"Worker {worker_id}: Found a match after {attempts} attempts! r = {r}")
-            asyncio.run(send_message(BOT_TOKEN, CHAT_ID, axlosaa))
-            exp = precomputed_table[diff_pub]
-            k_candidate = r + (1 ** exp)            # because we stored 1^i
-            # Verify quickly (optional, but safe)
-            if pubkey_from_scalar(k_candidate) == target_pub_hex:
-                elapsed = time.time() - start_time
-                print(f"Worker {worker_id}: found after {attempts} attempts in {elapsed:.2f}s")
-                result_queue.put((k_candidate, r, exp))
-                stop_event.set()
-                break
-
-        # Optional progress report (every million attempts)
-        # if attempts % 1_000_000 == 0:
-        #     elapsed = time.time() - start_time
-        #     rate = attempts / elapsed
-        #     print(f"Worker {worker_id}: {attempts} attempts, {rate:.0f} tries/sec")
-
-def parallel_find_match(target_pub_hex, precomputed_table, low, high,
-                        num_workers=4, total_max_attempts=None):
-    """
-    Parallel version using multiprocessing.
-    total_max_attempts: if set, each worker gets total_max_attempts // num_workers attempts.
-    """
-    # Prepare per-worker attempt limit
-    if total_max_attempts is not None:
-        per_worker = total_max_attempts // num_workers
-    else:
-        per_worker = None
-
-    # Create shared event and queue
-    stop_event = mp.Event()
-    result_queue = mp.Queue()
-
-    processes = []
-    for i in range(num_workers):
-        p = mp.Process(target=worker,
-                       args=(target_pub_hex, low, high, precomputed_table,
-                             stop_event, result_queue, i, per_worker))
-        p.start()
-        processes.append(p)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel Q - r*G table search")
+    add_search_arguments(parser, total_attempts=10**9)  # 1e9 total attempts across workers
+    args = parser.parse_args()
+    apply_search_arguments(parser, args)
 
-    # Wait for a result or for all processes to finish
-    try:
-        result = result_queue.get(timeout=None)  # blocks until something is queued
-        # Signal all workers to stop
-        stop_event.set()
-        # Wait for all to finish
-        for p in processes:
-            p.join(timeout=1)
-        return result   # (k, r, exp)
-    except KeyboardInterrupt:
-        print("Interrupted, stopping workers...")
-        stop_event.set()
-        for p in processes:
-            p.join(timeout=1)
-        return None
-    finally:
-        # Ensure all processes are terminated if still alive
-        for p in processes:
-            if p.is_alive():
-                p.terminate()
-                p.join()
+    # Notifications go through one background sender (Telegram if configured)
+    notifier = Notifier(make_backend(BOT_TOKEN, CHAT_ID, args.notify_log)).start()
+    notifier.notify("Starting the search for k...")
 
-if __name__ == "__main__":
     # Load precomputed table (16^i points)
-    table = load_precomputed("precomputed_hex.txt")
+    table = load_table(args.table, args.bloom)
     print(f"Loaded {len(table)} precomputed points.")
 
     target = "02145d2611c823a396ef6712ce0f712f09b9b4f3135e3e0aa3230fb9b6d08d1e16"
@@ -134,18 +29,27 @@ if __name__ == "__main__":
     HIGH = 43556142965880123323311949751266331066368
     LOW = 21778071482940061661655974875633165533184
 
-    # Use all available CPU cores
-    num_cores = mp.cpu_count()
-    print(f"Starting parallel search with {num_cores} workers...")
+    print(f"Starting parallel search with {args.workers} workers...")
 
     result = parallel_find_match(target, table, LOW, HIGH,
-                                 num_workers=num_cores,
-                                 total_max_attempts=10**9)  # 1e9 total attempts across workers
+                                 num_workers=args.workers,
+                                 total_max_attempts=args.attempts,
+                                 mode=args.mode, stride=args.stride,
+                                 chunk_size=args.chunk_size,
+                                 checkpoint_file=args.checkpoint,
+                                 resume=args.resume,
+                                 overwrite_checkpoint=args.fresh,
+                                 checkpoint_interval=args.checkpoint_interval,
+                                 report_interval=args.report_interval,
+                                 metrics_jsonl=args.metrics_jsonl,
+                                 metrics_prom=args.metrics_prom,
+                                 notify_queue=notifier.queue)
 
     if result:
         k, r, exp = result
-        message = (f"\nSUCCESS: k = {k} (r = {r}, exponent = {exp}, 16^{exp} = {16**exp})")
+        message = (f"\nSUCCESS: k = {k} (r = {r}, exponent = {exp})")
         print(message)
-        asyncio.run(send_message(BOT_TOKEN, CHAT_ID, message))
+        notifier.notify(message)
     else:
-        print("\nNo match found within attempt limit.")
\ No newline at end of file
+        print("\nNo match found within attempt limit.")
+    notifier.close()
\ No newline at end of file
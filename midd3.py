@@ -1,25 +1,34 @@
 import os
 import random
 import time
+import argparse
+import queue
 import multiprocessing as mp
 from example import *   # Assumes pubkey_from_scalar, subtract_pubkeys are fast (C extensions)
+from bintable import BinaryTable, SharedTable, is_binary_table
+from bloom import BloomFilter, FilteredTable
+from metrics import create_counters, add_block, MetricsReporter
+from partition import Partition
+import profiling
+import backend
+from checkpoint import (save_state, load_state, check_params, check_overwrite,
+                        rng_state_to_json, rng_state_from_json)
 
-import asyncio
-from telegram import Bot
+from notify import Notifier, make_backend, post
 
 BOT_TOKEN = '8'
 CHAT_ID = 0
 
-async def send_message(bot_token, chat_id, message):
-    bot = Bot(token=bot_token)
-    await bot.send_message(chat_id=chat_id, text=message)
-    print("Message sent successfully!")
+class XOnlyTable(dict):
+    """dict keyed by the 32-byte x coordinate: e*G and -e*G share an entry."""
+    x_only = True
 
-def load_precomputed(filename):
+def load_precomputed(filename, x_only=True):
     """Load precomputed points from file.
-       Returns a dict: compressed_pubkey -> exponent (int)
+       Returns a dict: x coordinate (32 raw bytes) -> exponent (int), or with
+       x_only=False compressed_pubkey (33 raw bytes) -> exponent (int)
     """
-    table = {}
+    table = XOnlyTable() if x_only else {}
     try:
         with open(filename, 'r') as f:
             for line_num, line in enumerate(f, 1):
@@ -32,85 +41,318 @@ def load_precomputed(filename):
                     continue
                 exp_str, pub_hex = parts
                 try:
-                    table[pub_hex] = int(exp_str)
+                    key = bytes.fromhex(pub_hex)
+                    table[key[1:] if x_only else key] = int(exp_str)
                 except ValueError:
-                    print(f"Warning: line {line_num} has non-integer exponent, skipping: {line}")
+                    print(f"Warning: line {line_num} has bad exponent or pubkey, skipping: {line}")
     except FileNotFoundError:
         print(f"Error: file '{filename}' not found.")
         raise
     return table
 
-def worker(target_pub_hex, low, high, precomputed_table, stop_event, result_queue, worker_id, max_attempts=None):
+def load_table(filename, bloom_file=None):
+    """Open a precomputed table: binary files (bintable.py) are mmapped,
+       text files are parsed with load_precomputed.
+       bloom_file: a bloom.py filter put in front of a binary table.
     """
-    Worker process: repeatedly picks random r, computes Q - r*G, checks if in table.
-    If found, puts (k, r, exp) into result_queue and sets stop_event.
+    if is_binary_table(filename):
+        table = BinaryTable(filename)
+        return FilteredTable(table, BloomFilter.open(bloom_file)) if bloom_file else table
+    if bloom_file:
+        raise ValueError("--bloom needs a binary table (convert it with bintable.py)")
+    return load_precomputed(filename)
+
+def check_candidates(table, x_only, rs, diffs, target_point, limit=None):
+    """
+    Look up every diff = Q - r*G of a block and verify the hits.
+    x_only: the table is keyed by x (table.x_only), so a hit on exp stands for
+    +-exp*G and both k = r + exp and k = r - exp are tried. diff INF means r is k.
+    Stops at the first r > limit (a walk that ran off its interval / chunk).
+    Returns (match, lookups, hits), match being the verified (k, r, exp) or None;
+    verification also rules out fingerprint collisions in binary tables.
+    """
+    lookups = hits = 0
+    for r, diff in zip(rs, diffs):
+        if limit is not None and r > limit:
+            break
+        if diff is INF:
+            exps = (0,)
+        else:
+            diff_key = diff[0].to_bytes(32, 'big') if x_only else point_to_bytes(diff)
+            lookups += 1
+            if diff_key not in table:
+                continue
+            hits += 1
+            exp = table[diff_key]
+            exps = (exp, -exp) if x_only else (exp,)
+        for exp in exps:
+            if backend.scalar_mult_base(r + exp) == target_point:
+                return (r + exp, r, exp), lookups, hits
+    return None, lookups, hits
+
+def worker(target_pub_hex, low, high, precomputed_table, stop_event, result_queue, worker_id,
+           max_attempts=None, batch_size=1024, mode="random", stride=1,
+           state_queue=None, initial_state=None, state_every=5.0, counters=None,
+           notify_queue=None, partition=None):
+    """
+    Worker process: checks Q - r*G against the table for blocks of batch_size
+    candidates r, sharing one inversion per block. With an x-only table
+    (table.x_only) a hit on exp means Q - r*G = +-exp*G, so each lookup covers
+    k = r + exp and k = r - exp; the sign is resolved when verifying.
+      mode="random": every r is drawn independently from [low, high].
+      mode="scan":   walks r0, r0+stride, r0+2*stride, ... from a random r0, so each
+                     candidate costs one point addition instead of a full r*G.
+      mode="partition": walks disjoint chunks claimed from a shared partition.Partition
+                     (the partition argument), so no r is tried twice; the worker
+                     stops when every chunk has been claimed.
+    If found, puts (k, r, exp) into result_queue, with k = r + exp (exp may be
+    negative), and sets stop_event.
+    With a state_queue, (worker_id, state) snapshots of the last finished block
+    are posted every state_every seconds and on exit; passing such a state back
+    as initial_state continues the search where it stopped. A state without
+    "rng", e.g. {"attempts": 0, "r_base": low}, starts a scan at a chosen r.
+    counters: optional shared metrics array (metrics.create_counters); each block
+    adds its attempts, lookups, hits and EC / lookup time to this worker's row.
+    notify_queue: optional notify.Notifier queue; a match is announced there
+    without waiting on the network.
+    With profiling on (profiling.py, counts), the time of every block's phases
+    is added to the process's profile.
+    Block starts and match checks use backend.py's active EC backend.
     """
+    t_setup = time.perf_counter()
+    profile_phases = "counts" in profiling.enabled_kinds()
     # Use a local random generator seeded uniquely
     rng = random.Random()
     rng.seed(os.urandom(8) + worker_id.to_bytes(4, 'big'))
+    if initial_state is not None and initial_state.get("rng"):
+        rng.setstate(rng_state_from_json(initial_state["rng"]))
 
-    attempts = 0
+    target_point = decompress_pubkey(target_pub_hex)
+    x_only = getattr(precomputed_table, "x_only", False)
+    attempts = initial_state["attempts"] if initial_state else 0
     start_time = time.time()
 
-    while True:
-        # Stop if global event is set (another worker found a match)
-        if stop_event.is_set():
-            break
+    if mode == "scan":
+        # j*stride*G for j < batch_size, plus the jump to the next block
+        step_points = scalar_mult_base_batch([j * stride for j in range(batch_size)])
+        block_step = backend.scalar_mult_base(batch_size * stride)
+        r_base = initial_state["r_base"] if initial_state else None
+        if r_base is not None and r_base <= high:
+            current = backend.subtract_points(target_point, backend.scalar_mult_base(r_base))
+    elif mode == "partition":
+        step_points = scalar_mult_base_batch([j * stride for j in range(batch_size)])
+        block_step = backend.scalar_mult_base(batch_size * stride)
+        r_base = None
+        resume = partition.resume_point(worker_id)
+        if resume is not None:
+            # Finish the chunk this worker held when the checkpoint was written
+            r_base = resume[1]
+            limit = partition.bounds(resume[0])[1]
+            if r_base <= limit:
+                current = backend.subtract_points(target_point, backend.scalar_mult_base(r_base))
+    elif mode != "random":
+        raise ValueError(f"Unknown search mode: {mode}")
+    else:
+        r_base = None
+    if mode != "partition":
+        limit = high
 
-        # Stop if we've reached our individual attempt limit
-        if max_attempts is not None and attempts >= max_attempts:
-            break
+    def snapshot():
+        return {"attempts": attempts, "rng": rng_state_to_json(rng.getstate()), "r_base": r_base}
 
-        attempts += 1
-        r = rng.randint(low, high)
-        R_pub = pubkey_from_scalar(r)                # compute r*G
-        diff_pub = subtract_pubkeys(target_pub_hex, R_pub)   # Q - r*G
+    state = snapshot()
+    last_post = time.time()
+    if profile_phases:
+        profiling.record("worker.setup", time.perf_counter() - t_setup)
+    try:
+        while True:
+            # Stop if global event is set (another worker found a match)
+            if stop_event.is_set():
+                break
+
+            # Stop if we've reached our individual attempt limit
+            if max_attempts is not None and attempts >= max_attempts:
+                break
 
-        if diff_pub in precomputed_table:
-            exp = precomputed_table[diff_pub]
-            k_candidate = r + exp
-            # Verify quickly (optional, but safe)
-            if pubkey_from_scalar(k_candidate) == target_pub_hex:
+            block = batch_size if max_attempts is None else min(batch_size, max_attempts - attempts)
+            t_ec = time.perf_counter()
+            if mode == "partition" and (r_base is None or r_base > limit):
+                claim = partition.claim(worker_id)
+                if claim is None:
+                    break                       # every chunk is taken
+                r_base, limit = partition.bounds(claim)
+                current = backend.subtract_points(target_point, backend.scalar_mult_base(r_base))
+            if mode in ("scan", "partition"):
+                if r_base is None or r_base > high:
+                    # (Re)start the walk at a random point
+                    r_base = rng.randint(low, high)
+                    current = backend.subtract_points(target_point, backend.scalar_mult_base(r_base))
+                rs = [r_base + j * stride for j in range(block)]
+                # Q - r*G for the block and the next block's start, one inversion.
+                # A short last block (attempt limit) only moves the cursor past
+                # the r it tried, so a checkpoint never skips untried r.
+                jump = block_step if block == batch_size else step_points[block]
+                diffs = point_sub_batch([(current, step_points[j]) for j in range(block)]
+                                        + [(current, jump)])
+                current = diffs.pop()
+                r_base += block * stride
+            else:
+                rs = [rng.randint(low, high) for _ in range(block)]
+                diffs = subtract_base_multiples_batch(target_point, rs)   # Q - r*G
+
+            t_lookup = time.perf_counter()
+            match, lookups, hits = check_candidates(precomputed_table, x_only, rs, diffs,
+                                                    target_point, limit)
+            if match is not None:
+                k_candidate, r, exp = match
+                tried = attempts + rs.index(r) + 1
                 elapsed = time.time() - start_time
-                print(f"Worker {worker_id}: found after {attempts} attempts in {elapsed:.2f}s")
-                result_queue.put((k_candidate, r, exp))
+                print(f"Worker {worker_id}: found after {tried} attempts in {elapsed:.2f}s")
+                post(notify_queue, f"Worker {worker_id}: found a match after {tried} attempts! r = {r}")
+                result_queue.put(match)
                 stop_event.set()
-                break
+                return
+            t_done = time.perf_counter()
+            if mode == "partition":
+                block = min(block, (limit - rs[0]) // stride + 1)
+                partition.advance(worker_id, block)
+            attempts += block
+            state = snapshot()
+            if counters is not None:
+                add_block(counters, worker_id, block, lookups, hits,
+                          t_lookup - t_ec, t_done - t_lookup)
+
+            if state_queue is not None and time.time() - last_post >= state_every:
+                state_queue.put((worker_id, state))
+                last_post = time.time()
+            if profile_phases:
+                profiling.record("worker.ec", t_lookup - t_ec)
+                profiling.record("worker.lookup", t_done - t_lookup)
+                profiling.record("worker.bookkeeping", time.perf_counter() - t_done)
+    except KeyboardInterrupt:
+        pass    # the parent saves the checkpoint; just report the last finished block
+    finally:
+        if state_queue is not None:
+            state_queue.put((worker_id, state))
 
-        # Optional progress report (every million attempts)
-        # if attempts % 1_000_000 == 0:
-        #     elapsed = time.time() - start_time
-        #     rate = attempts / elapsed
-        #     print(f"Worker {worker_id}: {attempts} attempts, {rate:.0f} tries/sec")
+def _drain_states(state_queue, states):
+    """Move every pending (worker_id, state) snapshot into states."""
+    while True:
+        try:
+            worker_id, state = state_queue.get_nowait()
+        except queue.Empty:
+            return
+        states[worker_id] = state
 
 def parallel_find_match(target_pub_hex, precomputed_table, low, high,
-                        num_workers=4, total_max_attempts=None):
+                        num_workers=4, total_max_attempts=None,
+                        batch_size=1024, mode="random", stride=1,
+                        checkpoint_file=None, resume=False, checkpoint_interval=60.0,
+                        report_interval=30.0, metrics_jsonl=None, metrics_prom=None,
+                        notify_queue=None, chunk_size=2**20, overwrite_checkpoint=False):
     """
     Parallel version using multiprocessing.
     total_max_attempts: if set, each worker gets total_max_attempts // num_workers attempts.
+    batch_size, mode, stride: passed through to worker().
+    chunk_size: r values per chunk in mode="partition"; the exact covered
+    fraction of the interval is then part of every report.
+    checkpoint_file: if set, per-worker progress is saved there every
+    checkpoint_interval seconds and when the search stops; resume=True continues
+    from it (same target, range, mode and number of workers). An existing
+    checkpoint_file is only replaced by a new search with overwrite_checkpoint=True.
+    report_interval: seconds between keys/sec reports on stdout (None: off);
+    metrics_jsonl / metrics_prom: also append JSON lines / rewrite a Prometheus text file.
+    notify_queue: passed to the workers (see notify.Notifier).
     Returns (k, r, exp) if found, else None.
     """
+    check_overwrite(checkpoint_file, resume, overwrite_checkpoint)
     # Prepare per-worker attempt limit
     if total_max_attempts is not None:
         per_worker = total_max_attempts // num_workers
     else:
         per_worker = None
 
+    params = {"target": target_pub_hex, "low": low, "high": high, "num_workers": num_workers,
+              "batch_size": batch_size, "mode": mode, "stride": stride}
+    partition = None
+    if mode == "partition":
+        params["chunk_size"] = chunk_size
+        partition = Partition(low, high, num_workers, chunk_size, stride)
+    states = {}
+    elapsed_before = 0.0
+    if resume and checkpoint_file:
+        saved = load_state(checkpoint_file)
+        if saved is None:
+            print(f"No checkpoint at {checkpoint_file}, starting a new search.")
+        else:
+            check_params(saved, params, checkpoint_file)
+            states = {int(w): state for w, state in saved["workers"].items()}
+            if partition is not None:
+                partition.restore(saved["partition"])
+            elapsed_before = saved["elapsed"]
+            print(f"Resuming from {checkpoint_file}: {saved['attempts']} attempts "
+                  f"in {elapsed_before:.0f}s already done.")
+
+    prepare_fixed_base()
+
+    shared_table = SharedTable.from_table(precomputed_table)
+    if shared_table is not None:
+        precomputed_table = shared_table
+
     # Create shared event and queue
     stop_event = mp.Event()
     result_queue = mp.Queue()
+    state_queue = mp.Queue() if checkpoint_file else None
+    counters = create_counters(num_workers) if report_interval else None
 
     processes = []
     for i in range(num_workers):
-        p = mp.Process(target=worker,
+        p = mp.Process(target=profiling.process_target(worker, f"worker-{i}"),
                        args=(target_pub_hex, low, high, precomputed_table,
-                             stop_event, result_queue, i, per_worker))
+                             stop_event, result_queue, i, per_worker,
+                             batch_size, mode, stride, state_queue, states.get(i),
+                             5.0, counters, notify_queue, partition))
         p.start()
         processes.append(p)
 
+    start_time = time.time()
+    last_save = start_time
+    result = None
+    reporter = (MetricsReporter(counters, report_interval, metrics_jsonl, metrics_prom,
+                                partition.status if partition is not None else None)
+                if counters is not None else None)
+
+    def save_checkpoint():
+        state = {"params": params,
+                 "elapsed": elapsed_before + time.time() - start_time,
+                 "attempts": sum(s["attempts"] for s in states.values()),
+                 "workers": {str(w): s for w, s in states.items()}}
+        if partition is not None:
+            state["partition"] = partition.state()
+        if result is not None:
+            state["result"] = list(result)
+        save_state(checkpoint_file, state)
+
+    def stop_workers(timeout):
+        # Keep draining snapshots while workers exit so none blocks on a full pipe
+        stop_event.set()
+        deadline = time.time() + timeout
+        while any(p.is_alive() for p in processes) and time.time() < deadline:
+            if state_queue is not None:
+                _drain_states(state_queue, states)
+            time.sleep(0.01)
+
     # Monitor for a result or for all workers to finish
     try:
         while True:
+            if state_queue is not None:
+                _drain_states(state_queue, states)
+                if time.time() - last_save >= checkpoint_interval:
+                    save_checkpoint()
+                    last_save = time.time()
+            if reporter is not None:
+                reporter.maybe_report()
+
             # Check if any process is still alive
             alive = any(p.is_alive() for p in processes)
             if not alive:
@@ -120,13 +362,10 @@ def parallel_find_match(target_pub_hex, precomputed_table, low, high,
             # Peek at the queue without blocking (timeout 0.1 sec)
             try:
                 result = result_queue.get(timeout=0.1)
-                # We got a result – signal all workers to stop
-                stop_event.set()
-                # Wait a short moment for workers to notice the event
-                for p in processes:
-                    p.join(timeout=0.5)
+                # We got a result – signal all workers to stop and wait for them
+                stop_workers(timeout=0.5 * num_workers)
                 return result
-            except mp.queues.Empty:
+            except queue.Empty:
                 # No result yet, continue monitoring
                 pass
 
@@ -135,15 +374,16 @@ def parallel_find_match(target_pub_hex, precomputed_table, low, high,
 
         # All workers finished, check queue one last time
         if not result_queue.empty():
-            return result_queue.get()
-        else:
-            return None
+            result = result_queue.get()
+        elif partition is not None and partition.exhausted():
+            print(f"Every r in [{low}, {high}] (stride {stride}) has been tried.")
+        return result
 
     except KeyboardInterrupt:
         print("Interrupted, stopping workers...")
-        stop_event.set()
-        for p in processes:
-            p.join(timeout=1)
+        stop_workers(timeout=max(1.0, 0.5 * num_workers))
+        if checkpoint_file:
+            print(f"Progress saved to {checkpoint_file}; rerun with --resume to continue.")
         return None
     finally:
         # Terminate any lingering processes
@@ -151,11 +391,70 @@ def parallel_find_match(target_pub_hex, precomputed_table, low, high,
             if p.is_alive():
                 p.terminate()
                 p.join()
+        if state_queue is not None:
+            _drain_states(state_queue, states)
+            save_checkpoint()
+        if reporter is not None:
+            reporter.report()
+        if shared_table is not None:
+            shared_table.close()
+
+def add_search_arguments(parser, total_attempts):
+    """Command-line flags shared by the midd.py / midd3.py entry points."""
+    parser.add_argument("--table", default="precomputed_hex.txt",
+                        help="text or binary precomputed table")
+    parser.add_argument("--bloom", default=None,
+                        help="Bloom filter (bloom.py) in front of a binary --table")
+    parser.add_argument("--mode", choices=("random", "scan", "partition"), default="random")
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=2**20,
+                        help="r values per chunk in partition mode")
+    parser.add_argument("--workers", type=int, default=mp.cpu_count())
+    parser.add_argument("--attempts", type=int, default=total_attempts,
+                        help="total attempts across all workers")
+    parser.add_argument("--checkpoint", default="search_state.json",
+                        help="state file written periodically during the search")
+    parser.add_argument("--checkpoint-interval", type=float, default=60.0)
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the search saved in --checkpoint")
+    parser.add_argument("--fresh", action="store_true",
+                        help="start a new search even if --checkpoint already exists (replaces it)")
+    parser.add_argument("--report-interval", type=float, default=30.0,
+                        help="seconds between throughput reports (0: off)")
+    parser.add_argument("--metrics-jsonl", default=None,
+                        help="append throughput reports to this JSON-lines file")
+    parser.add_argument("--metrics-prom", default=None,
+                        help="keep a Prometheus text-format metrics file up to date")
+    parser.add_argument("--notify-log", default=None,
+                        help="offline runs: append notifications to this file instead of stdout")
+    backend.add_backend_argument(parser)
+    profiling.add_profile_arguments(parser)
+
+def apply_search_arguments(parser, args):
+    """Act on the shared flags before any work starts: checkpoint safety, EC backend, profiling."""
+    if args.resume and args.fresh:
+        parser.error("--resume and --fresh are mutually exclusive")
+    try:
+        check_overwrite(args.checkpoint, args.resume, args.fresh)
+    except FileExistsError as e:
+        parser.error(str(e))
+    print(f"EC backend: {backend.use_backend(args.backend).name}")
+    if args.profile:
+        profiling.enable(args.profile, args.profile_dir)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel Q - r*G table search")
+    # Adjust total attempts based on expected probability and time constraints
+    # For a 32-bit range and a table of size M, the expected number of random trials
+    # to find a match is about (2^32) / M. If M is 10,000, that's ~429,000 trials.
+    # Here we set a conservative limit; you may increase or remove it.
+    add_search_arguments(parser, total_attempts=10**7)  # 10 million total attempts (adjust as needed)
+    args = parser.parse_args()
+    apply_search_arguments(parser, args)
+
     # Load precomputed table
     try:
-        table = load_precomputed("precomputed_hex.txt")
+        table = load_table(args.table, args.bloom)
         print(f"Loaded {len(table)} precomputed points.")
     except Exception as e:
         print(f"Failed to load table: {e}")
@@ -167,29 +466,33 @@ if __name__ == "__main__":
     HIGH = 43556142965880123323311949751266331066368
     LOW = 21778071482940061661655974875633165533184
 
-    # Notify start via Telegram (only from main process)
-    asyncio.run(send_message(BOT_TOKEN, CHAT_ID, "Starting the search for k..."))
-
-    # Use all available CPU cores
-    num_cores = mp.cpu_count()
-    print(f"Starting parallel search with {num_cores} workers...")
+    # Notifications go through one background sender (Telegram if configured)
+    notifier = Notifier(make_backend(BOT_TOKEN, CHAT_ID, args.notify_log)).start()
+    notifier.notify("Starting the search for k...")
 
-    # Adjust total attempts based on expected probability and time constraints
-    # For a 32-bit range and a table of size M, the expected number of random trials
-    # to find a match is about (2^32) / M. If M is 10,000, that's ~429,000 trials.
-    # Here we set a conservative limit; you may increase or remove it.
-    total_attempts = 10**7  # 10 million total attempts (adjust as needed)
+    print(f"Starting parallel search with {args.workers} workers...")
 
     result = parallel_find_match(target, table, LOW, HIGH,
-                                 num_workers=num_cores,
-                                 total_max_attempts=total_attempts)
+                                 num_workers=args.workers,
+                                 total_max_attempts=args.attempts,
+                                 mode=args.mode, stride=args.stride,
+                                 chunk_size=args.chunk_size,
+                                 checkpoint_file=args.checkpoint,
+                                 resume=args.resume,
+                                 overwrite_checkpoint=args.fresh,
+                                 checkpoint_interval=args.checkpoint_interval,
+                                 report_interval=args.report_interval,
+                                 metrics_jsonl=args.metrics_jsonl,
+                                 metrics_prom=args.metrics_prom,
+                                 notify_queue=notifier.queue)
 
     if result:
         k, r, exp = result
         message = (f"\nSUCCESS: k = {k} (r = {r}, exponent = {exp})")
         print(message)
-        asyncio.run(send_message(BOT_TOKEN, CHAT_ID, message))
+        notifier.notify(message)
     else:
         message = "\nNo match found within attempt limit."
         print(message)
-        asyncio.run(send_message(BOT_TOKEN, CHAT_ID, message))
\ No newline at end of file
+        notifier.notify(message)
+    notifier.close()
\ No newline at end of file
@@ -0,0 +1,319 @@
+"""
+Multi-target search: check many public keys against the table in one pass.
+
+A targets file lists one key per line with the interval its k lies in:
+
+    # pubkey                                                            low       high
+    02145d2611c823a396ef6712ce0f712f09b9b4f3135e3e0aa3230fb9b6d08d1e16  0x4000... 0x7fff...
+    02e4d9aab1c5e3a1c2ca6af7f51d06b4ed412ea495aecd00d72869009b923a6734  0x4000... 0x7fff...
+
+(low / high in decimal or 0x-hex). Targets with the same [low, high] form a
+range class. Per block a worker picks the candidates r once per class and
+derives Q - r*G for every active target of the class from the same r*G:
+  mode="random": r*G is computed once per r (one inversion to bring the
+                 block to affine) and subtracted from each target (one more
+                 inversion, shared by all targets of the class).
+  mode="scan":   every target walks from its own Q - r0*G with the shared
+                 step points j*stride*G; one inversion for the whole class.
+All resulting points then go through one table pass.
+
+A solved key is reported (stdout, notifier, and the --solved file) and
+dropped from the active set of every worker; the search ends when all
+targets are solved or the attempt limit is reached. Keys already listed in
+the --solved file are skipped on the next run.
+
+    python multitarget.py targets.txt --table precomputed.bin --mode scan
+"""
+
+import argparse
+import os
+import queue
+import random
+import time
+import multiprocessing as mp
+from example import *
+from bintable import SharedTable
+from midd3 import BOT_TOKEN, CHAT_ID, load_table, check_candidates
+from metrics import create_counters, add_block, MetricsReporter
+from notify import Notifier, make_backend, post
+
+
+def read_targets(filename: str):
+    """[(pub_hex, low, high), ...] from a targets file; '#' starts a comment."""
+    targets = []
+    with open(filename) as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) != 3:
+                raise ValueError(f"{filename}:{line_num}: expected 'pubkey low high', got {line!r}")
+            pub_hex, low, high = parts[0].lower(), int(parts[1], 0), int(parts[2], 0)
+            if not 0 < low <= high:
+                raise ValueError(f"{filename}:{line_num}: need 0 < low <= high")
+            decompress_pubkey(pub_hex)      # reject malformed keys up front
+            targets.append((pub_hex, low, high))
+    return targets
+
+
+def read_solved(filename: str):
+    """{pub_hex: k} from a --solved file ('pubkey k' per line); {} if it does not exist."""
+    solved = {}
+    if filename and os.path.exists(filename):
+        with open(filename) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    solved[parts[0].lower()] = int(parts[1], 0)
+    return solved
+
+
+def group_targets(targets):
+    """Range classes: [((low, high), [pub_hex, ...]), ...] in file order, duplicates removed.
+    A key listed with two different ranges is searched in both classes."""
+    classes = {}
+    for pub_hex, low, high in targets:
+        members = classes.setdefault((low, high), [])
+        if pub_hex not in members:
+            members.append(pub_hex)
+    return list(classes.items())
+
+
+def multi_worker(classes, precomputed_table, solved_flags, stop_event, result_queue, worker_id,
+                 max_attempts=None, batch_size=1024, mode="random", stride=1, counters=None,
+                 notify_queue=None):
+    """
+    Worker process: one block of batch_size candidates r per range class and
+    round, tested against every still-active target of the class.
+    classes: [((low, high), [(flag index, pub_hex), ...]), ...] as numbered by
+    parallel_find_many(); a member is active while solved_flags[index] == 0.
+    A verified hit puts (pub_hex, k, r, exp) into result_queue and sets the
+    flag; the parent sets the flags of the key's other classes, so every
+    worker drops it.
+    max_attempts counts (r, target) pairs, like the attempts in the metrics.
+    """
+    rng = random.Random()
+    rng.seed(os.urandom(8) + worker_id.to_bytes(4, 'big'))
+    x_only = getattr(precomputed_table, "x_only", False)
+
+    # Per class: [low, high, [(flag index, pub_hex, point), ...], scan r_base, {index: Q - r_base*G}]
+    state = []
+    for (low, high), slots in classes:
+        members = [(flag, pub, decompress_pubkey(pub)) for flag, pub in slots]
+        state.append([low, high, members, None, {}])
+    if mode == "scan":
+        step_points = scalar_mult_base_batch([j * stride for j in range(batch_size)])
+        block_step = scalar_mult_base(batch_size * stride)
+    elif mode != "random":
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    attempts = 0
+    start_time = time.time()
+    try:
+        while not stop_event.is_set():
+            if max_attempts is not None and attempts >= max_attempts:
+                break
+            any_active = False
+            for entry in state:
+                low, high, members, r_base, currents = entry
+                active = [m for m in members if not solved_flags[m[0]]]
+                if not active:
+                    continue
+                any_active = True
+                block = batch_size
+                if max_attempts is not None:
+                    block = max(1, min(block, (max_attempts - attempts) // len(active)))
+
+                t_ec = time.perf_counter()
+                if mode == "scan":
+                    if r_base is None or r_base > high:
+                        r_base = rng.randint(low, high)
+                        start = scalar_mult_base(r_base)
+                        currents.clear()
+                        currents.update((i, subtract_points(point, start)) for i, _, point in members)
+                    rs = [r_base + j * stride for j in range(block)]
+                    jump = block_step if block == batch_size else step_points[block]
+                    pairs = []
+                    for i, _, _ in active:
+                        pairs += [(currents[i], step_points[j]) for j in range(block)]
+                        pairs.append((currents[i], jump))
+                    diffs = point_sub_batch(pairs)
+                    per_target = []
+                    for n, (i, _, _) in enumerate(active):
+                        chunk = diffs[n * (block + 1):(n + 1) * (block + 1)]
+                        currents[i] = chunk.pop()
+                        per_target.append(chunk)
+                    entry[3] = r_base + block * stride
+                else:
+                    rs = [rng.randint(low, high) for _ in range(block)]
+                    # Two inversions per class and block: r*G to affine, then all Q - r*G.
+                    # (Mixed Jacobian subtraction would save one, but costs more per target.)
+                    r_points = scalar_mult_base_batch(rs)          # shared by every target
+                    diffs = point_sub_batch([(point, rp) for _, _, point in active for rp in r_points])
+                    per_target = [diffs[n * block:(n + 1) * block] for n in range(len(active))]
+
+                t_lookup = time.perf_counter()
+                lookups = hits = 0
+                for (i, pub, point), target_diffs in zip(active, per_target):
+                    match, n_lookups, n_hits = check_candidates(precomputed_table, x_only, rs,
+                                                                target_diffs, point, high)
+                    lookups += n_lookups
+                    hits += n_hits
+                    if match is not None:
+                        k_candidate, r, exp = match
+                        elapsed = time.time() - start_time
+                        print(f"Worker {worker_id}: solved {pub} after {elapsed:.2f}s")
+                        post(notify_queue, f"Worker {worker_id}: solved {pub}, r = {r}")
+                        result_queue.put((pub, k_candidate, r, exp))
+                        solved_flags[i] = 1     # drop it here at once, not a round later
+                attempts += block * len(active)
+                if counters is not None:
+                    add_block(counters, worker_id, block * len(active), lookups, hits,
+                              t_lookup - t_ec, time.perf_counter() - t_lookup)
+            if not any_active:
+                break
+    except KeyboardInterrupt:
+        pass
+
+
+def parallel_find_many(targets, precomputed_table, num_workers=4, total_max_attempts=None,
+                       batch_size=1024, mode="random", stride=1, solved_file=None,
+                       report_interval=30.0, notify_queue=None):
+    """
+    Search all targets ([(pub_hex, low, high), ...]) with one pool of workers.
+    solved_file: solved keys are appended to it as 'pubkey k', and keys already
+    in it are not searched again.
+    Returns {pub_hex: k} for every key solved in this run.
+    """
+    known = read_solved(solved_file)
+    skipped = {t[0] for t in targets if t[0] in known}
+    if skipped:
+        print(f"Skipping {len(skipped)} already solved target(s).")
+    # One solved flag per (class, key): the workers only ever see these numbers
+    classes = []
+    flags_of = {}           # pub_hex -> its flag in every class it is listed in
+    num_flags = 0
+    for bounds, pubs in group_targets([t for t in targets if t[0] not in known]):
+        slots = []
+        for pub in pubs:
+            flags_of.setdefault(pub, []).append(num_flags)
+            slots.append((num_flags, pub))
+            num_flags += 1
+        classes.append((bounds, slots))
+    if not classes:
+        return {}
+    print(f"{len(flags_of)} target(s) in {len(classes)} range class(es).")
+    per_worker = total_max_attempts // num_workers if total_max_attempts is not None else None
+
+    prepare_fixed_base()
+    shared_table = SharedTable.from_table(precomputed_table)
+    if shared_table is not None:
+        precomputed_table = shared_table
+
+    solved_flags = mp.Array('b', num_flags, lock=False)
+    stop_event = mp.Event()
+    result_queue = mp.Queue()
+    counters = create_counters(num_workers) if report_interval else None
+    processes = []
+    for i in range(num_workers):
+        p = mp.Process(target=multi_worker,
+                       args=(classes, precomputed_table, solved_flags, stop_event, result_queue, i,
+                             per_worker, batch_size, mode, stride, counters, notify_queue))
+        p.start()
+        processes.append(p)
+
+    found = {}
+    reporter = (MetricsReporter(counters, report_interval,
+                                status=lambda: f"{len(found)}/{len(flags_of)} solved")
+                if counters is not None else None)
+
+    def collect(timeout):
+        try:
+            pub, k, r, exp = result_queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        if pub in found:
+            return          # two workers hit the same key in the same round
+        for flag in flags_of[pub]:
+            solved_flags[flag] = 1
+        found[pub] = k
+        print(f"SOLVED {pub}: k = {k} ({hex(k)}), r = {r}, exponent = {exp} "
+              f"[{len(found)}/{len(flags_of)}]")
+        if solved_file:
+            with open(solved_file, "a") as f:
+                f.write(f"{pub} {hex(k)}\n")
+
+    failed = {}
+
+    def check_exits():
+        for i, p in enumerate(processes):
+            if p.exitcode not in (None, 0) and i not in failed:
+                failed[i] = p.exitcode
+                print(f"Worker {i} exited with code {p.exitcode}; its share of the search is not done")
+
+    try:
+        while any(p.is_alive() for p in processes):
+            collect(0.1)
+            check_exits()
+            if len(found) == len(flags_of):
+                stop_event.set()
+            if reporter is not None:
+                reporter.maybe_report()
+        while not result_queue.empty():
+            collect(0.1)
+        check_exits()
+        if failed and len(found) < len(flags_of):
+            print(f"{len(failed)} of {num_workers} worker(s) failed; the search is incomplete.")
+    except KeyboardInterrupt:
+        print("Interrupted, stopping workers...")
+        stop_event.set()
+    finally:
+        for p in processes:
+            p.join(timeout=1.0)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        if reporter is not None:
+            reporter.report()
+        if shared_table is not None:
+            shared_table.close()
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Q - r*G table search for many targets at once")
+    parser.add_argument("targets", help="file with 'pubkey low high' lines")
+    parser.add_argument("--table", default="precomputed_hex.txt",
+                        help="text or binary precomputed table")
+    parser.add_argument("--bloom", default=None,
+                        help="Bloom filter (bloom.py) in front of a binary --table")
+    parser.add_argument("--mode", choices=("random", "scan"), default="random")
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=mp.cpu_count())
+    parser.add_argument("--attempts", type=int, default=None,
+                        help="total (r, target) pairs across all workers (default: no limit)")
+    parser.add_argument("--solved", default="solved.txt",
+                        help="solved keys are appended here and skipped on later runs")
+    parser.add_argument("--report-interval", type=float, default=30.0,
+                        help="seconds between throughput reports (0: off)")
+    parser.add_argument("--notify-log", default=None,
+                        help="append notifications to this file instead of stdout")
+    args = parser.parse_args()
+
+    targets = read_targets(args.targets)
+    searched = {pub for pub, _, _ in targets} - set(read_solved(args.solved))
+    table = load_table(args.table, args.bloom)
+    print(f"Loaded {len(table)} precomputed points.")
+
+    notifier = Notifier(make_backend(BOT_TOKEN, CHAT_ID, args.notify_log)).start()
+    found = parallel_find_many(targets, table, num_workers=args.workers,
+                               total_max_attempts=args.attempts, batch_size=args.batch_size,
+                               mode=args.mode, stride=args.stride, solved_file=args.solved,
+                               report_interval=args.report_interval or None,
+                               notify_queue=notifier.queue)
+    message = f"Multi-target search done: {len(found)} of {len(searched)} key(s) solved this run."
+    print(message)
+    notifier.notify(message)
+    notifier.close()
@@ -0,0 +1,181 @@
+"""
+Non-blocking notifications for the search scripts.
+
+A Notifier runs one background thread in the parent process. Anyone, worker
+processes included, hands it messages through a multiprocessing queue with
+put_nowait, so the caller never waits on the network. The thread batches
+queued messages, rate-limits sends and retries failures. It delivers them
+through a pluggable backend:
+
+    TelegramBackend  one Bot / HTTP connection pool for the whole run
+    StdoutBackend    offline stand-in, prints messages
+    FileBackend      offline stand-in, appends to a log file
+"""
+
+import asyncio
+import queue
+import threading
+import time
+import multiprocessing as mp
+
+TELEGRAM_MAX_LEN = 4096
+
+
+class StdoutBackend:
+    def open(self):
+        pass
+
+    def send(self, text: str):
+        print(f"[notify] {text}")
+
+    def close(self):
+        pass
+
+
+class FileBackend:
+    def __init__(self, path: str):
+        self.path = path
+
+    def open(self):
+        pass
+
+    def send(self, text: str):
+        with open(self.path, "a") as f:
+            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {text}\n")
+
+    def close(self):
+        pass
+
+
+class TelegramBackend:
+    """Sends through one telegram.Bot kept open on the notifier thread's own event loop."""
+
+    def __init__(self, bot_token: str, chat_id):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self._loop = None
+        self._bot = None
+
+    def open(self):
+        from telegram import Bot
+
+        self._loop = asyncio.new_event_loop()
+        self._bot = Bot(token=self.bot_token)
+        self._loop.run_until_complete(self._bot.initialize())
+
+    def send(self, text: str):
+        from telegram.error import RetryAfter
+
+        try:
+            self._loop.run_until_complete(
+                self._bot.send_message(chat_id=self.chat_id, text=text[:TELEGRAM_MAX_LEN]))
+        except RetryAfter as e:
+            # Flood control: wait as long as Telegram asks, then let the retry loop resend
+            retry_after = e.retry_after
+            time.sleep(retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else retry_after)
+            raise
+
+    def close(self):
+        if self._bot is not None:
+            try:
+                self._loop.run_until_complete(self._bot.shutdown())
+            finally:
+                self._loop.close()
+
+
+def make_backend(bot_token: str = "", chat_id=None, log_file: str = None):
+    """Telegram when credentials are set, else the log file, else stdout."""
+    if bot_token and chat_id:
+        return TelegramBackend(bot_token, chat_id)
+    if log_file:
+        return FileBackend(log_file)
+    return StdoutBackend()
+
+
+def post(notify_queue, message: str):
+    """Queue a message without blocking; drops it if there is no notifier or the queue is full."""
+    if notify_queue is None:
+        return
+    try:
+        notify_queue.put_nowait(message)
+    except queue.Full:
+        pass
+
+
+class Notifier:
+    """Background sender. Pass notifier.queue to worker processes and use post()."""
+
+    def __init__(self, backend, min_interval=1.0, max_batch=20, retries=3,
+                 retry_delay=2.0, maxsize=1000):
+        self.backend = backend
+        self.min_interval = min_interval
+        self.max_batch = max_batch
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.queue = mp.Queue(maxsize)
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def notify(self, message: str):
+        post(self.queue, message)
+
+    def close(self, timeout=10.0):
+        """Flush what is queued (up to timeout seconds) and stop the thread."""
+        self._closing.set()
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _take_batch(self):
+        try:
+            batch = [self.queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, text: str):
+        for attempt in range(self.retries + 1):
+            try:
+                self.backend.send(text)
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f"Notification dropped after {attempt + 1} attempts: {e}")
+                else:
+                    time.sleep(self.retry_delay * 2 ** attempt)
+
+    def _run(self):
+        try:
+            self.backend.open()
+        except Exception as e:
+            print(f"Notifier backend unavailable ({e}); falling back to stdout")
+            self.backend = StdoutBackend()
+
+        last_send = 0.0
+        try:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    if self._closing.is_set():
+                        break
+                    continue
+                wait = self.min_interval - (time.time() - last_send)
+                if wait > 0:
+                    time.sleep(wait)
+                self._deliver("\n".join(batch))
+                last_send = time.time()
+        finally:
+            self.backend.close()
@@ -0,0 +1,114 @@
+"""
+Disjoint, deterministic partitioning of [LOW, HIGH] for the search workers.
+
+The r positions low, low + stride, ... <= high are cut into fixed-size
+chunks. Workers claim chunks one at a time from a shared counter, so a
+worker that finishes early simply claims the next one (work stealing
+without a scheduler process), and no r is ever tried twice. Claim number i
+maps to chunk (a*i + b) mod num_chunks, an affine permutation fixed by the
+seed, so the covered part is spread over the whole interval instead of
+growing from LOW.
+
+All state lives in shared memory: the claim counter, plus each worker's
+current chunk and its progress inside that chunk. That makes the covered
+fraction exact at any moment, and state() / restore() let a checkpoint
+resume every worker mid-chunk.
+"""
+
+import math
+import random
+import multiprocessing as mp
+
+
+class Partition:
+    def __init__(self, low: int, high: int, num_workers: int, chunk_size: int = 2**20,
+                 stride: int = 1, seed: int = 0):
+        self.low, self.high, self.stride = low, high, stride
+        self.count = (high - low) // stride + 1
+        self.chunk_size = chunk_size
+        self.num_chunks = -(-self.count // chunk_size)
+        self.seed = seed
+        rng = random.Random(seed)
+        n = self.num_chunks
+        self._a = 1
+        if n > 2:
+            self._a = rng.randrange(1, n)
+            while math.gcd(self._a, n) != 1:
+                self._a = rng.randrange(1, n)
+        self._b = rng.randrange(n)
+
+        self._next = mp.Value('q', 0)
+        self._chunk = mp.Array('q', [-1] * num_workers, lock=False)
+        self._progress = mp.Array('q', num_workers, lock=False)
+
+    def chunk_of(self, i: int) -> int:
+        """Chunk handed out by claim number i."""
+        return (self._a * i + self._b) % self.num_chunks
+
+    def _size(self, chunk: int) -> int:
+        return min(self.chunk_size, self.count - chunk * self.chunk_size)
+
+    def bounds(self, i: int):
+        """(first r, last r) of claim number i."""
+        chunk = self.chunk_of(i)
+        first = chunk * self.chunk_size
+        return (self.low + first * self.stride,
+                self.low + (first + self._size(chunk) - 1) * self.stride)
+
+    def claim(self, worker_id: int):
+        """Take the next chunk for worker_id; returns its claim number, or None when all are taken."""
+        with self._next.get_lock():
+            i = self._next.value
+            if i >= self.num_chunks:
+                self._chunk[worker_id] = -1
+                return None
+            self._next.value = i + 1
+            self._progress[worker_id] = 0
+            self._chunk[worker_id] = i
+        return i
+
+    def resume_point(self, worker_id: int):
+        """(claim number, next r) of the chunk worker_id was in, or None."""
+        i = self._chunk[worker_id]
+        if i < 0:
+            return None
+        return i, self.bounds(i)[0] + self._progress[worker_id] * self.stride
+
+    def advance(self, worker_id: int, positions: int):
+        """Worker side: positions more r values of the current chunk are done."""
+        self._progress[worker_id] += positions
+
+    def covered_count(self) -> int:
+        """Number of r positions searched so far."""
+        with self._next.get_lock():
+            claimed = self._next.value
+            active = [(i, p) for i, p in zip(self._chunk, self._progress) if i >= 0]
+        done = claimed * self.chunk_size
+        if self._claim_of(self.num_chunks - 1) < claimed:
+            done -= self.chunk_size - self._size(self.num_chunks - 1)   # the one short chunk
+        return done - sum(self._size(self.chunk_of(i)) - p for i, p in active)
+
+    def _claim_of(self, chunk: int) -> int:
+        """Inverse of chunk_of."""
+        return (chunk - self._b) * pow(self._a, -1, self.num_chunks) % self.num_chunks
+
+    def covered(self) -> float:
+        return self.covered_count() / self.count
+
+    def exhausted(self) -> bool:
+        return self._next.value >= self.num_chunks and all(i < 0 for i in self._chunk)
+
+    def status(self) -> str:
+        return f"covered {self.covered():.6%} of the interval ({self.covered_count():,} r)"
+
+    def state(self):
+        """JSON-able snapshot for a checkpoint."""
+        with self._next.get_lock():
+            return {"next": self._next.value, "chunk": list(self._chunk),
+                    "progress": list(self._progress)}
+
+    def restore(self, state):
+        with self._next.get_lock():
+            self._next.value = state["next"]
+            self._chunk[:] = state["chunk"]
+            self._progress[:] = state["progress"]
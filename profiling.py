@@ -0,0 +1,267 @@
+"""
+Opt-in profiling for the EC layer and the search workers.
+
+Nothing here runs unless profiling is switched on, either with the
+environment variable
+
+    MOJO_PROFILE=counts,cprofile,stacks      (or 1 / all)
+    MOJO_PROFILE_DIR=profiles                (default: ./profiles)
+
+or with --profile / --profile-dir on midd.py and midd3.py (which just set
+those variables, so worker processes inherit them). When it is off no
+function is wrapped and workers run unchanged; the only trace left in the
+worker is one local boolean test per block.
+
+    counts    call counts and total (inclusive) time for the example.py
+              primitives (mod_inv, batch_inv, decompress_pubkey,
+              compress_pubkey, ...) and the table lookups, plus per-phase
+              time of midd3.worker (setup, ec, lookup, bookkeeping).
+              Written as <label>.counts.json and printed when a worker exits.
+    cprofile  the whole worker under cProfile -> <label>.prof
+              (python -m pstats, snakeviz, ...).
+    stacks    a SIGPROF stack sampler -> <label>.stacks in collapsed format
+              for flamegraph.pl or speedscope (Unix only).
+
+    python profiling.py profiles/            # merge and print every worker's output
+"""
+
+import argparse
+import cProfile
+import functools
+import glob
+import json
+import os
+import pstats
+import signal
+import sys
+import time
+from collections import Counter
+
+ENV = "MOJO_PROFILE"
+ENV_DIR = "MOJO_PROFILE_DIR"
+KINDS = ("counts", "cprofile", "stacks")
+
+# example.py functions wrapped in counts mode; nested calls are counted too
+PRIMITIVES = ("mod_inv", "batch_inv", "point_add", "point_add_batch", "point_sub_batch",
+              "jacobian_to_affine_batch", "scalar_mult", "scalar_mult_glv", "scalar_mult_base",
+              "scalar_mult_base_batch", "subtract_base_multiples_batch", "add_points",
+              "subtract_points", "decompress_pubkey", "compress_pubkey", "point_to_bytes",
+              "point_from_bytes")
+
+_stats = {}             # name -> [calls, seconds], per process
+
+
+def enabled_kinds():
+    """The profiling kinds switched on in this process's environment (empty: off)."""
+    spec = os.environ.get(ENV, "").strip().lower()
+    if spec in ("", "0", "off", "none"):
+        return set()
+    if spec in ("1", "all", "on"):
+        return set(KINDS)
+    kinds = {kind.strip() for kind in spec.split(",") if kind.strip()}
+    unknown = kinds - set(KINDS)
+    if unknown:
+        raise ValueError(f"{ENV}: unknown profiling kind(s) {', '.join(sorted(unknown))}; "
+                         f"choose from {', '.join(KINDS)}")
+    return kinds
+
+
+def enable(spec: str, out_dir: str = None):
+    """Switch profiling on for this process and every process it starts."""
+    os.environ[ENV] = spec
+    if out_dir:
+        os.environ[ENV_DIR] = out_dir
+    enabled_kinds()     # fail early on a typo
+
+
+def output_dir() -> str:
+    out_dir = os.environ.get(ENV_DIR, "profiles")
+    os.makedirs(out_dir, exist_ok=True)
+    return out_dir
+
+
+# ---------- counts ----------
+
+def record(name: str, seconds: float):
+    entry = _stats.get(name)
+    if entry is None:
+        entry = _stats[name] = [0, 0.0]
+    entry[0] += 1
+    entry[1] += seconds
+
+
+def counted(name: str, func):
+    """func wrapped to add one call and its wall time to _stats[name]."""
+    perf_counter = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(name, perf_counter() - start)
+
+    wrapper.__wrapped_by_profiling__ = True
+    return wrapper
+
+
+def instrument():
+    """Wrap the example.py primitives and the table lookup methods in this process.
+
+    Modules that did `from example import *` hold their own references, so
+    every loaded module whose global still points at an original function is
+    patched as well.
+    """
+    import example
+    for name in PRIMITIVES:
+        original = getattr(example, name, None)
+        if original is None or getattr(original, "__wrapped_by_profiling__", False):
+            continue
+        wrapper = counted(name, original)
+        for module in list(sys.modules.values()):
+            if getattr(module, name, None) is original:
+                setattr(module, name, wrapper)
+
+    from bintable import PackedTable
+    from bloom import BloomFilter, FilteredTable
+    for cls, methods in ((PackedTable, ("get", "__contains__", "__getitem__")),
+                         (BloomFilter, ("__contains__",)),
+                         (FilteredTable, ("get", "__contains__"))):
+        for method in methods:
+            original = cls.__dict__[method]
+            if not getattr(original, "__wrapped_by_profiling__", False):
+                setattr(cls, method, counted(f"{cls.__name__}.{method}", original))
+
+
+def format_counts(stats, top: int = None) -> str:
+    rows = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    lines = [f"{'name':<36} {'calls':>12} {'total s':>10} {'us/call':>10}"]
+    for name, (calls, seconds) in rows:
+        lines.append(f"{name:<36} {calls:>12,} {seconds:>10.3f} {seconds / calls * 1e6:>10.2f}")
+    return "\n".join(lines)
+
+
+# ---------- stacks ----------
+
+class StackSampler:
+    """Samples the Python stack on SIGPROF (process CPU time) into collapsed form."""
+
+    def __init__(self, interval: float = 0.005):
+        if not hasattr(signal, "ITIMER_PROF"):
+            raise RuntimeError("stack sampling needs setitimer(ITIMER_PROF) (Unix)")
+        self.interval = interval
+        self.samples = Counter()
+        self._previous = None
+
+    def _sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        self.samples[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+
+    def write(self, filename: str):
+        with open(filename, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# ---------- running a worker under the profilers ----------
+
+def run_profiled(func, label, *args, **kwargs):
+    """Call func(*args, **kwargs) with every enabled kind of profiling, then
+    write <label>.* into output_dir(). Used as a process target through
+    functools.partial(run_profiled, worker, "worker-0"), which pickles."""
+    kinds = enabled_kinds()
+    if not kinds:
+        return func(*args, **kwargs)
+    if "counts" in kinds:
+        instrument()
+    sampler = StackSampler().start() if "stacks" in kinds else None
+    profiler = cProfile.Profile() if "cprofile" in kinds else None
+    try:
+        if profiler is not None:
+            return profiler.runcall(func, *args, **kwargs)
+        return func(*args, **kwargs)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        out = os.path.join(output_dir(), label)
+        if profiler is not None:
+            profiler.dump_stats(out + ".prof")
+        if sampler is not None:
+            sampler.write(out + ".stacks")
+        if "counts" in kinds and _stats:
+            with open(out + ".counts.json", "w") as f:
+                json.dump(_stats, f, indent=1)
+            print(f"Profile of {label}:\n{format_counts(_stats, top=12)}")
+        print(f"{label}: profile written to {out}.*")
+
+
+def process_target(func, label):
+    """func itself when profiling is off, else a picklable profiled wrapper."""
+    if not enabled_kinds():
+        return func
+    return functools.partial(run_profiled, func, label)
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", default=None, metavar="KINDS",
+                        help=f"profile the workers: comma list of {', '.join(KINDS)}, or all "
+                             f"(same as {ENV}=...)")
+    parser.add_argument("--profile-dir", default=None,
+                        help=f"where per-worker profiles go (default: ./profiles, or ${ENV_DIR})")
+
+
+def summarize(out_dir: str, top: int = 25):
+    """Merge and print every worker's output in out_dir."""
+    merged = {}
+    for filename in sorted(glob.glob(os.path.join(out_dir, "*.counts.json"))):
+        with open(filename) as f:
+            for name, (calls, seconds) in json.load(f).items():
+                entry = merged.setdefault(name, [0, 0.0])
+                entry[0] += calls
+                entry[1] += seconds
+    if merged:
+        print("Call counts and inclusive time, all workers:")
+        print(format_counts(merged, top))
+
+    profiles = sorted(glob.glob(os.path.join(out_dir, "*.prof")))
+    if profiles:
+        print(f"\ncProfile, {len(profiles)} file(s), by cumulative time:")
+        pstats.Stats(*profiles).sort_stats("cumulative").print_stats(top)
+
+    stacks = Counter()
+    for filename in sorted(glob.glob(os.path.join(out_dir, "*.stacks"))):
+        if os.path.basename(filename) == "all.stacks":
+            continue
+        with open(filename) as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                stacks[stack] += int(count)
+    if stacks:
+        merged_file = os.path.join(out_dir, "all.stacks")
+        with open(merged_file, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"\n{sum(stacks.values())} stack samples merged into {merged_file} "
+              f"(flamegraph.pl {merged_file} > flame.svg)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize per-worker profiles")
+    parser.add_argument("dir", nargs="?", default="profiles")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+    summarize(args.dir, args.top)
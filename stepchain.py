@@ -0,0 +1,189 @@
+"""
+Step-chain engine for the digit-peeling experiments in main.py, main2.py
+and test.py.
+
+Each step of those scripts takes the current maximum m (a known scalar) and
+target T (a point), picks a digit d at power k, and checks
+
+    (m*G - T) + (T - d*radix^k*G)  ==  (m - d*radix^k)*G
+
+before moving on with m' = m - d*radix^k and T' = T - d*radix^k*G. Here the
+digit schedule is data: run_chain() does any number of steps, takes every
+d*radix^k*G from one cached table (MultiplesCache, built with
+gen_pubs2.radix_multiples), and evaluates all candidate digits of a level
+with one shared inversion per batch.
+
+Note that the comparison above holds for every T: it confirms the point
+arithmetic, not the digit. What a step can really reveal is a residual
+T - d*radix^k*G that is infinity (the peeled scalar is exactly the key) or
+that is found in a precomputed table. With a table (midd3.load_table) every
+candidate residual is looked up, and a verified hit is reported as solved.
+
+    python stepchain.py --schedule 7,f,f,f      # main.py's STEP 1-4
+"""
+
+import argparse
+import json
+from example import *
+from gen_pubs2 import radix_multiples
+from midd3 import check_candidates, load_table
+
+
+class MultiplesCache:
+    """d * radix^k * G for d = 1..radix-1, computed once per power k."""
+
+    def __init__(self, radix: int = 16):
+        self.radix = radix
+        self._levels = {}
+
+    def prefetch(self, powers):
+        """Build every missing level in one radix_multiples call (shared chains and inversion)."""
+        missing = [k for k in set(powers) if k not in self._levels and k >= 0]
+        if not missing:
+            return
+        lo, hi = min(missing), max(missing)
+        entries = radix_multiples(self.radix, range(1, self.radix), max_k=hi, min_k=lo)
+        per_level = self.radix - 1
+        for i, k in enumerate(range(lo, hi + 1)):
+            level = entries[i * per_level:(i + 1) * per_level]
+            self._levels.setdefault(k, {d: point for d, (_, point) in enumerate(level, 1)})
+
+    def point(self, d: int, k: int):
+        """d * radix^k * G (INF for d = 0)."""
+        if d == 0:
+            return INF
+        if k not in self._levels:
+            self.prefetch([k])
+        return self._levels[k][d]
+
+
+def top_power(maximum: int, radix: int = 16) -> int:
+    """Largest k with radix^k < maximum: the first digit position to peel."""
+    k = 0
+    while radix ** (k + 1) < maximum:
+        k += 1
+    return k
+
+
+def parse_digits(text: str, radix: int = 16):
+    """'7,f,f,f' -> [7, 15, 15, 15]; digits are written in the given radix."""
+    digits = [int(d, radix) for d in text.split(",") if d.strip()]
+    if any(not 0 <= d < radix for d in digits):
+        raise ValueError(f"digits must be in 0..{radix - 1}")
+    return digits
+
+
+def run_step(target_point, maximum: int, k: int, digit: int, candidates, cache: MultiplesCache,
+             table=None, peeled: int = 0, original_point=None):
+    """
+    One level of the chain. Every candidate digit is evaluated in the same
+    batches; `digit` is the one the chain continues with.
+    Returns (report, next_maximum, next_target_point).
+    """
+    radix = cache.radix
+    original_point = target_point if original_point is None else original_point
+    digits = sorted(set(candidates) | {digit})
+    cache.prefetch([k])
+    subtrahends = [cache.point(d, k) for d in digits]
+
+    max_point = scalar_mult_base(maximum)
+    max_minus_target = subtract_points(max_point, target_point)
+    residuals = point_sub_batch([(target_point, D) for D in subtrahends])            # T - D
+    sums = point_add_batch([(max_minus_target, res) for res in residuals])          # (M - T) + (T - D)
+    expected = scalar_mult_base_batch([maximum - d * radix ** k for d in digits])   # (m - D)*G
+
+    rows = []
+    solved = None
+    for d, res, lhs, rhs in zip(digits, residuals, sums, expected):
+        D = d * radix ** k
+        row = {"digit": d, "residual": compress_pubkey(res) if res is not INF else None,
+               "check": lhs == rhs, "hit": None}
+        if res is INF or table is not None:
+            # The residual is (k - peeled - D)*G: look it up like a search worker's Q - r*G
+            match, _, _ = check_candidates(table, getattr(table, "x_only", False),
+                                           [peeled + D], [res], original_point)
+            if match is not None:
+                row["hit"] = match[2]
+                solved = match[0] % N_ORDER
+        rows.append(row)
+
+    chosen = rows[digits.index(digit)]
+    report = {"power": k, "digit": digit, "maximum": hex(maximum),
+              "target": compress_pubkey(target_point), "check": chosen["check"],
+              "candidates": rows, "solved": solved}
+    next_target = residuals[digits.index(digit)]
+    return report, maximum - digit * radix ** k, next_target
+
+
+def run_chain(target_pub_hex: str, maximum: int, schedule, radix: int = 16, start_k: int = None,
+              candidates=None, table=None, cache: MultiplesCache = None, verbose=True):
+    """
+    Peel schedule[0] at power start_k (default: top_power(maximum)), schedule[1]
+    at start_k - 1, and so on. candidates: digits evaluated at every level
+    (default: all of 1..radix-1). Stops early when a step solves the key.
+    Returns the list of per-step reports.
+    """
+    cache = cache or MultiplesCache(radix)
+    start_k = top_power(maximum, radix) if start_k is None else start_k
+    if len(schedule) > start_k + 1:
+        raise ValueError(f"schedule has {len(schedule)} digits but only powers {start_k}..0 are left")
+    candidates = list(range(1, radix)) if candidates is None else candidates
+    cache.prefetch(range(start_k - len(schedule) + 1, start_k + 1))
+
+    original_point = decompress_pubkey(target_pub_hex)
+    target_point = original_point
+    peeled = 0
+    reports = []
+    for step, digit in enumerate(schedule, 1):
+        k = start_k - step + 1
+        report, maximum, next_target = run_step(target_point, maximum, k, digit, candidates,
+                                                cache, table, peeled, original_point)
+        report["step"] = step
+        reports.append(report)
+        if verbose:
+            print_step(report, radix)
+        if report["solved"] is not None:
+            break
+        peeled += digit * radix ** k
+        target_point = next_target
+        if target_point is INF:
+            break
+    return reports
+
+
+def print_step(report, radix: int = 16):
+    digit = format(report["digit"], "x") if radix == 16 else str(report["digit"])
+    status = "Success" if report["check"] else "MISMATCH"
+    hits = [row["digit"] for row in report["candidates"] if row["hit"] is not None]
+    print(f"STEP-{report['step']}: digit {digit} at {radix}^{report['power']}: {status}"
+          + (f", match for digit(s) {hits}" if hits else ""))
+    if report["solved"] is not None:
+        print(f"  solved: k = {report['solved']} ({hex(report['solved'])})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a digit-peeling step chain")
+    parser.add_argument("--target", default="02145d2611c823a396ef6712ce0f712f09b9b4f3135e3e0aa3230fb9b6d08d1e16")
+    parser.add_argument("--maximum", default="0x8000000000000000000000000000000000",
+                        help="starting maximum (hex)")
+    parser.add_argument("--radix", type=int, default=16)
+    parser.add_argument("--schedule", default="7,f,f,f",
+                        help="digit per step, written in the radix (default: main.py's 7,f,f,f)")
+    parser.add_argument("--start-power", type=int, default=None,
+                        help="power of the first digit (default: just below --maximum)")
+    parser.add_argument("--candidates", default=None,
+                        help="digits evaluated at every level (default: all)")
+    parser.add_argument("--table", default=None,
+                        help="precomputed table to look residuals up in")
+    parser.add_argument("--json", default=None, help="write the per-step reports here")
+    args = parser.parse_args()
+
+    table = None
+    if args.table:
+        table = load_table(args.table)
+    candidates = parse_digits(args.candidates, args.radix) if args.candidates else None
+    reports = run_chain(args.target, int(args.maximum, 16), parse_digits(args.schedule, args.radix),
+                        args.radix, args.start_power, candidates, table)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)